@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from drumvision.config import ConfigManager
+from drumvision.hit_detection import HitEvent
+from drumvision.inference import HandLandmarks
+from drumvision.kit import DrumKit
+from drumvision.landmark_cache import LandmarkCache
+from drumvision.markers import MarkerTracker
+from drumvision.profiling import Profiler
+from drumvision.replay import ReplayCamera, load_labels, score_hits, session_hits
+from drumvision.utils import load_json, save_json, setup_logging
+from run import create_detector, create_tracker
+
+# Allowed slack before a run counts as a regression against --baseline.
+FPS_REGRESSION = 0.10
+F1_REGRESSION = 0.02
+
+
+def bench_session(
+    path: str, config_manager: ConfigManager, tolerance_ms: float, use_cache: bool = True
+) -> Dict[str, object]:
+    """Runs one recorded session through tracker and detector at max speed.
+
+    Frames go through ``HandTracker.process`` with the live app's focus, so
+    the motion gate and load governor act as they would on the camera.
+    """
+    config = config_manager.config
+    tracker = create_tracker(config)
+    detector = create_detector(config)
+    kit = DrumKit.from_config(config)
+    tracker.set_focus(kit.bounds(), kit.regions())
+    # Only MediaPipe landmarks are cached; markers are cheaper to detect
+    # than to load. The governor reacts to real inference times and changes
+    # the model settings the cache is keyed on, so it bypasses the cache too.
+    use_cache = use_cache and not isinstance(tracker, MarkerTracker) and tracker.governor is None
+    cache = LandmarkCache.for_session(path, tracker) if use_cache else None
+    cached_before = cache.cached if cache is not None else 0
+    # A complete cache means the video never needs decoding, unless the
+    # detector checks ROI pixels or the motion gate watches the pads.
+    decode = cache is None or not cache.complete or detector.impact is not None or tracker.motion is not None
+    camera = ReplayCamera(path, realtime=False, decode=decode)
+    # Undecoded replays still need the frame size; nothing reads the pixels.
+    blank = np.broadcast_to(np.zeros((), np.uint8), (*camera.frame_shape, 3))
+    index = 0
+    inferred = 0
+    infer = tracker.infer
+
+    def cached_infer(frame: np.ndarray, crop: bool = True) -> HandLandmarks:
+        nonlocal inferred
+        inferred += 1
+        if cache is None:
+            return infer(frame, crop)
+        detected = cache.get(index)
+        if detected is None:
+            detected = infer(frame, crop=False)
+            cache.put(index, detected)
+        return detected
+
+    tracker.infer = cached_infer
+    # One window spanning the whole run, so percentiles cover every frame.
+    profiler = Profiler(window=float("inf"))
+    events: List[HitEvent] = []
+    # Session-relative times of the frames the motion gate skipped.
+    gated: List[float] = []
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            captured = camera.read_frame()
+            if captured is None:
+                break
+            frames += 1
+            index = captured.index - 1
+            image = captured.image if captured.image is not None else blank
+            gated_before = tracker.motion.stats.gated if tracker.motion is not None else 0
+            # Capture-to-inference is meaningless on a replay clock, so only
+            # the processing stages are timed.
+            infer_start = time.perf_counter()
+            hands = tracker.process(image, captured.timestamp)
+            infer_end = time.perf_counter()
+            events.extend(detector.process(hands, kit, config.mode, captured.timestamp, captured.image))
+            profiler.record("inference", (infer_end - infer_start) * 1000)
+            profiler.record("detection", (time.perf_counter() - infer_end) * 1000)
+            if tracker.motion is not None and tracker.motion.stats.gated > gated_before:
+                gated.append(captured.timestamp - camera.base)
+    finally:
+        elapsed = time.perf_counter() - start
+        camera.release()
+        tracker.close()
+        if cache is not None:
+            cache.flush()
+
+    hits = session_hits(events, camera.base)
+    result: Dict[str, object] = {
+        "session": path,
+        "frames": frames,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "cached_frames": cached_before,
+        "skipped_frames": frames - inferred,
+        "stages": profiler.report(),
+        "hits": len(hits),
+    }
+    if tracker.motion is not None:
+        stats = tracker.motion.stats
+        result["motion_gate"] = {"gated": stats.gated, "checked": stats.checked, "surprises": stats.surprises}
+    labels = load_labels(path)
+    if labels is not None:
+        score = score_hits(hits, labels, tolerance_ms)
+        result["accuracy"] = score.report()
+        if tracker.motion is not None:
+            # A missed hit with a gated frame within the tolerance is one the
+            # gate may have suppressed.
+            tolerance = tolerance_ms / 1000.0
+            times = np.array(gated)
+            result["motion_gate"]["missed_hits"] = sum(
+                1 for hit in score.missed if len(times) and np.abs(times - float(hit["t"])).min() <= tolerance
+            )
+    return result
+
+
+def check_baseline(results: List[Dict[str, object]], baseline_path: str) -> List[str]:
+    baseline = {entry["session"]: entry for entry in load_json(baseline_path)["sessions"]}
+    failures = []
+    for result in results:
+        previous = baseline.get(result["session"])
+        if previous is None:
+            continue
+        if result["fps"] < previous["fps"] * (1.0 - FPS_REGRESSION):
+            failures.append(f"{result['session']}: fps {result['fps']:.1f} < baseline {previous['fps']:.1f}")
+        if "accuracy" in result and "accuracy" in previous:
+            f1, base_f1 = result["accuracy"]["f1"], previous["accuracy"]["f1"]
+            if f1 < base_f1 - F1_REGRESSION:
+                failures.append(f"{result['session']}: f1 {f1:.3f} < baseline {base_f1:.3f}")
+    return failures
+
+
+def print_result(result: Dict[str, object]) -> None:
+    print(
+        f"{result['session']}: {result['frames']} frames ({result['cached_frames']} cached), "
+        f"{result['fps']:.1f} fps, {result['hits']} hits, {result['skipped_frames']} frames skipped"
+    )
+    gate = result.get("motion_gate")
+    if gate:
+        print(
+            f"  motion gate: gated {gate['gated']}/{gate['checked']} frames, surprises {gate['surprises']}"
+            + (f", labelled hits missed while gated {gate['missed_hits']}" if "missed_hits" in gate else "")
+        )
+    for name, stats in result["stages"].items():
+        print(f"  {name:<10} p50 {stats['p50_ms']:6.2f}  p95 {stats['p95_ms']:6.2f}  p99 {stats['p99_ms']:6.2f} ms")
+    accuracy = result.get("accuracy")
+    if accuracy:
+        print(
+            f"  precision {accuracy['precision']:.3f}  recall {accuracy['recall']:.3f}  f1 {accuracy['f1']:.3f}"
+            f"  timing bias {accuracy['timing_bias_ms']:+.1f} ms  mae {accuracy['timing_mae_ms']:.1f} ms"
+            f"  p95 {accuracy['timing_p95_ms']:.1f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark DrumVision on recorded sessions")
+    parser.add_argument("sessions", nargs="+", help="session directories recorded with run.py --record")
+    parser.add_argument("--tolerance-ms", type=float, default=50.0, help="max timing error of a matched hit")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="fail if fps or f1 regress against this JSON report")
+    parser.add_argument("--no-cache", action="store_true", help="always run inference instead of cached landmarks")
+    args = parser.parse_args()
+    setup_logging()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    config_manager = ConfigManager()
+    results = [bench_session(path, config_manager, args.tolerance_ms, not args.no_cache) for path in args.sessions]
+    for result in results:
+        print_result(result)
+    if args.output:
+        save_json(os.path.abspath(args.output), {"generated_at": time.time(), "sessions": results})
+    if args.baseline:
+        failures = check_baseline(results, args.baseline)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
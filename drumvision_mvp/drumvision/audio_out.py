@@ -2,19 +2,44 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, Optional, Union
 
 import pygame
 
+from .hit_detection import CANCELLABLE_HITS
+from .sampler import Sampler, Voice
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "samples")
+
 
 class AudioOut:
-    def __init__(self, enabled: bool = True) -> None:
+    def __init__(
+        self,
+        enabled: bool = True,
+        engine: str = "sampler",
+        buffer_size: int = 128,
+        max_voices: int = 32,
+        choke_groups: Optional[Dict[str, str]] = None,
+    ) -> None:
         self.enabled = enabled
+        self.sampler: Optional[Sampler] = None
         self.samples: Dict[str, pygame.mixer.Sound] = {}
+        # Hit id -> what is playing it (sampler voice, or pygame channel and
+        # the sound it was started with).
+        self._playing: "OrderedDict[int, Union[Voice, tuple]]" = OrderedDict()
         if not enabled:
             return
+        if engine == "sampler":
+            try:
+                self.sampler = Sampler(SAMPLES_DIR, buffer_size, max_voices, choke_groups)
+                return
+            except Exception as exc:
+                logging.warning("Sampler unavailable, falling back to pygame mixer: %s", exc)
         try:
+            pygame.mixer.pre_init(buffer=buffer_size)
             pygame.mixer.init()
+            pygame.mixer.set_num_channels(max_voices)
             logging.info("Pygame mixer initialized")
         except Exception as exc:
             logging.warning("Failed to init pygame mixer: %s", exc)
@@ -22,8 +47,14 @@ class AudioOut:
             return
         self._load_samples()
 
+    @property
+    def output_latency_ms(self) -> Optional[float]:
+        if self.sampler is not None:
+            return self.sampler.output_latency_ms
+        return None
+
     def _load_samples(self) -> None:
-        base = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "samples")
+        base = SAMPLES_DIR
         if not os.path.isdir(base):
             logging.warning("Samples directory missing: %s", base)
             return
@@ -37,17 +68,53 @@ class AudioOut:
             except Exception as exc:
                 logging.warning("Failed to load sample %s: %s", path, exc)
 
-    def play_hit(self, piece_name: str, velocity: int) -> None:
+    def _remember(self, hit_id: Optional[int], playing: Union[Voice, tuple]) -> None:
+        if hit_id is None:
+            return
+        self._playing[hit_id] = playing
+        if len(self._playing) > CANCELLABLE_HITS:
+            self._playing.popitem(last=False)
+
+    def play_hit(self, piece_name: str, velocity: int, hit_id: Optional[int] = None) -> None:
         if not self.enabled:
             return
+        if self.sampler is not None:
+            voice = self.sampler.play(piece_name, velocity)
+            if voice is not None:
+                self._remember(hit_id, voice)
+            return
         sample = self.samples.get(piece_name)
         if not sample:
             return
         volume = max(0.1, min(1.0, velocity / 127))
-        sample.set_volume(volume)
-        sample.play()
+        channel = sample.play()
+        if channel is not None:
+            # Per-channel volume, so overlapping hits on one piece keep their
+            # own dynamics instead of sharing the Sound's volume.
+            channel.set_volume(volume)
+            self._remember(hit_id, (channel, sample))
+
+    def cancel_hit(self, hit_id: int) -> None:
+        """Stops the sound of one hit; other hits on the piece keep playing."""
+        if not self.enabled:
+            return
+        playing = self._playing.pop(hit_id, None)
+        if playing is None:
+            return
+        if self.sampler is not None:
+            self.sampler.stop(playing)
+            return
+        channel, sample = playing
+        # The channel may have moved on to another sound since.
+        if channel.get_sound() is sample:
+            channel.stop()
 
     def close(self) -> None:
-        if self.enabled:
-            pygame.mixer.quit()
-            logging.info("Pygame mixer closed")
+        if not self.enabled:
+            return
+        if self.sampler is not None:
+            self.sampler.close()
+            logging.info("Sampler closed")
+            return
+        pygame.mixer.quit()
+        logging.info("Pygame mixer closed")
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import logging
+import math
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 from .kit import DrumKit
 from .tracking import HandState
 
@@ -78,6 +81,7 @@ class Calibrator:
                     x1, y1 = min(p1[0], p2[0]), min(p1[1], p2[1])
                     x2, y2 = max(p1[0], p2[0]), max(p1[1], p2[1])
                     kit.pieces[piece_name].roi = (x1, y1, x2, y2)
+                    kit.touch()
                 return message
         return message
 
@@ -90,6 +94,7 @@ class Calibrator:
         primary = max(hands, key=lambda h: h.confidence)
         kit.pieces[piece_name].position = primary.strike_point
         kit.pieces[piece_name].radius = self.state.radius
+        kit.touch()
         self.state.piece_index += 1
         return f"Set {piece_name} position"
 
@@ -112,6 +117,7 @@ class Calibrator:
             median = sorted(samples)[1]
             piece.threshold_speed = 0.7 * median
             piece.velocity_max = 1.8 * max(samples)
+            kit.touch()
             self.state.piece_index += 1
             message = f"Threshold set for {piece_name}"
         return message
@@ -121,3 +127,126 @@ class Calibrator:
         dx = point[0] - piece.position[0]
         dy = point[1] - piece.position[1]
         return dx * dx + dy * dy <= piece.radius * piece.radius
+
+
+# Log-spaced speed buckets from 10 px/s to ~20000 px/s, ~5% apart.
+SPEED_BUCKET_MIN = 10.0
+SPEED_BUCKET_RATIO = 1.05
+SPEED_BUCKET_COUNT = 160
+# Weight kept by older samples on each new one: about the last 50 strokes
+# dominate, so the suggestion follows a player who warms up or softens.
+LEARN_DECAY = 0.98
+LEARN_MIN_SAMPLES = 5
+# Entries slower than this (px/s), or than this fraction of the learned
+# median once there is one, are the hand drifting over the pad, not a stroke.
+LEARN_MIN_SPEED = 100.0
+LEARN_FLOOR_RATIO = 0.5
+
+
+class SpeedHistogram:
+    """Exponentially decayed log-bucket histogram; constant memory, no sorting."""
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(SPEED_BUCKET_COUNT)
+        self.samples = 0
+
+    def add(self, speed: float) -> None:
+        bucket = 0
+        if speed > SPEED_BUCKET_MIN:
+            bucket = int(math.log(speed / SPEED_BUCKET_MIN) / math.log(SPEED_BUCKET_RATIO)) + 1
+        self.counts *= LEARN_DECAY
+        self.counts[min(bucket, SPEED_BUCKET_COUNT - 1)] += 1.0
+        self.samples += 1
+
+    def quantile(self, q: float) -> float:
+        cumulative = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return SPEED_BUCKET_MIN * SPEED_BUCKET_RATIO**bucket
+
+
+@dataclass
+class PieceLearning:
+    entry: SpeedHistogram = field(default_factory=SpeedHistogram)
+    peak: SpeedHistogram = field(default_factory=SpeedHistogram)
+
+
+class LearningMode:
+    """Free-play calibration that runs alongside normal detection.
+
+    Every downstroke entering a pad feeds that pad's entry-speed histogram;
+    the fastest speed reached before the hand leaves or turns up feeds its
+    peak histogram. Once a pad has a few strokes, threshold_speed and
+    velocity_max follow the same rule as the 3-hit wizard (0.7x the median
+    entry speed; the peak scale from the hardest strokes), updated live.
+    """
+
+    def __init__(self, duration: float = 30.0) -> None:
+        self.duration = duration
+        self.active = False
+        self.started = 0.0
+        self.pieces: Dict[str, PieceLearning] = {}
+        self._inside: Dict[Tuple[int, str], bool] = {}
+        self._strokes: Dict[Tuple[int, str], float] = {}
+
+    def start(self, now: float) -> None:
+        self.active = True
+        self.started = now
+        self.pieces = {}
+        self._inside = {}
+        self._strokes = {}
+        logging.info("Learning mode started (%s)", f"{self.duration:.0f}s" if self.duration > 0 else "until stopped")
+
+    def stop(self) -> str:
+        self.active = False
+        learned = sorted(name for name, state in self.pieces.items() if state.entry.samples >= LEARN_MIN_SAMPLES)
+        logging.info("Learning mode stopped; updated %s", learned)
+        return f"Learning done: {', '.join(learned) or 'no pieces'} updated"
+
+    def update(self, hands: List[HandState], kit: DrumKit, mode: str, now: float) -> str:
+        if self.duration > 0 and now - self.started >= self.duration:
+            return self.stop()
+        present = {hand.hand_id for hand in hands}
+        if any(key[0] not in present for key in self._inside):
+            # Track ids are not reused, so state of vanished hands is dead.
+            self._inside = {key: value for key, value in self._inside.items() if key[0] in present}
+            self._strokes = {key: value for key, value in self._strokes.items() if key[0] in present}
+        pieces = kit.list_pieces()
+        points = np.array([hand.position for hand in hands], float).reshape(-1, 2)
+        inside = kit.index(mode).contains(points)
+        changed = False
+        for row, hand in enumerate(hands):
+            for col, piece in enumerate(pieces):
+                key = (hand.hand_id, piece.name)
+                was_inside = self._inside.get(key, False)
+                self._inside[key] = bool(inside[row, col])
+                if inside[row, col] and not was_inside and hand.v_y > 0:
+                    state = self.pieces.setdefault(piece.name, PieceLearning())
+                    floor = LEARN_MIN_SPEED
+                    if state.entry.samples >= LEARN_MIN_SAMPLES:
+                        floor = max(floor, LEARN_FLOOR_RATIO * state.entry.quantile(0.5))
+                    if hand.v_mag >= floor:
+                        state.entry.add(hand.v_mag)
+                        self._strokes[key] = hand.v_mag
+                    continue
+                peak = self._strokes.get(key)
+                if peak is None:
+                    continue
+                if inside[row, col] and hand.v_y > 0:
+                    self._strokes[key] = max(peak, hand.v_mag)
+                    continue
+                del self._strokes[key]
+                state = self.pieces[piece.name]
+                state.peak.add(peak)
+                if state.entry.samples >= LEARN_MIN_SAMPLES:
+                    piece.threshold_speed = 0.7 * state.entry.quantile(0.5)
+                    piece.velocity_max = max(piece.threshold_speed + 1.0, 1.1 * state.peak.quantile(0.95))
+                    changed = True
+        if changed:
+            kit.touch()
+        remaining = f"{self.duration - (now - self.started):.0f}s left" if self.duration > 0 else "press [a] to stop"
+        learned = [
+            f"{name} {kit.pieces[name].threshold_speed:.0f}"
+            for name, state in self.pieces.items()
+            if name in kit.pieces and state.entry.samples >= LEARN_MIN_SAMPLES
+        ]
+        return f"Learning ({remaining}): play freely" + (f" | {' '.join(learned)}" if learned else "")
@@ -2,22 +2,126 @@ from __future__ import annotations
 
 import cv2
 import logging
+import threading
+import time
+from dataclasses import dataclass
 from typing import Optional, Tuple
 
+import numpy as np
+
+
+@dataclass
+class CapturedFrame:
+    image: np.ndarray
+    timestamp: float
+    index: int
+    pos_msec: float = 0.0
+
 
 class CameraManager:
-    def __init__(self, camera_id: int = 0, frame_size: Optional[Tuple[int, int]] = None) -> None:
+    def __init__(
+        self,
+        camera_id: int = 0,
+        frame_size: Optional[Tuple[int, int]] = None,
+        background_grab: bool = False,
+    ) -> None:
+        self.camera_id = camera_id
         self.capture = cv2.VideoCapture(camera_id)
         if frame_size:
             self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
             self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
         if not self.capture.isOpened():
             raise RuntimeError("Could not open camera")
+        # Not every backend honours this, which is why background grabbing exists.
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.background_grab = background_grab
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        # Live cameras never run out of frames; replays do (see ReplayCamera).
+        self.finished = False
+        self._latest: Optional[CapturedFrame] = None
+        self._last_read_index = 0
+        self._clock_offset: Optional[float] = None
+        self._last_pos_msec = 0.0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
         logging.info("Camera initialized with id=%s", camera_id)
+        if background_grab:
+            self.start()
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self.background_grab = True
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name=f"camera-{self.camera_id}", daemon=True)
+        self._thread.start()
+        logging.info("Camera %s background grab started", self.camera_id)
+
+    def _timestamp(self, grab_ts: float) -> Tuple[float, float]:
+        pos_msec = float(self.capture.get(cv2.CAP_PROP_POS_MSEC) or 0.0)
+        if pos_msec <= 0.0 or pos_msec <= self._last_pos_msec:
+            self._clock_offset = None
+            self._last_pos_msec = 0.0
+            return grab_ts, pos_msec
+        self._last_pos_msec = pos_msec
+        # The driver clock is exact but has an unknown epoch. The smallest
+        # grab-minus-driver gap seen so far is the best estimate of the offset
+        # to the monotonic clock, since delivery delay only ever adds to it.
+        offset = grab_ts - pos_msec / 1000.0
+        if self._clock_offset is None or offset < self._clock_offset:
+            self._clock_offset = offset
+        return pos_msec / 1000.0 + self._clock_offset, pos_msec
+
+    def _grab(self) -> Optional[CapturedFrame]:
+        if not self.capture.grab():
+            return None
+        grab_ts = time.monotonic()
+        ok, image = self.capture.retrieve()
+        if not ok:
+            return None
+        timestamp, pos_msec = self._timestamp(grab_ts)
+        self.frames_captured += 1
+        return CapturedFrame(image, timestamp, self.frames_captured, pos_msec)
+
+    def _grab_loop(self) -> None:
+        while self._running:
+            frame = self._grab()
+            if frame is None:
+                time.sleep(0.005)
+                continue
+            with self._cond:
+                if self._latest is not None and self._latest.index > self._last_read_index:
+                    self.frames_dropped += 1
+                self._latest = frame
+                self._cond.notify_all()
+
+    def read_frame(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        if not self.background_grab:
+            return self._grab()
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._latest is not None and self._latest.index > self._last_read_index,
+                timeout,
+            )
+            if not ready:
+                return None
+            self._last_read_index = self._latest.index
+            return self._latest
 
     def read(self):
-        return self.capture.read()
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image
 
     def release(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
         self.capture.release()
-        logging.info("Camera released")
+        logging.info(
+            "Camera released (captured=%d dropped=%d)", self.frames_captured, self.frames_dropped
+        )
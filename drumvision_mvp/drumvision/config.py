@@ -21,13 +21,70 @@ class PieceConfig(BaseModel):
     velocity_max: float = 2000.0
     threshold_speed: float = 400.0
     roi: Optional[List[int]] = None
+    priority: int = 0
+    # A hand re-arms a pad once it moves up faster than this fraction of
+    # threshold_speed (or leaves the pad).
+    rearm_ratio: float = 0.5
+    choke_group: Optional[str] = None
+    # Strike points (see AppConfig.strike_points) allowed to hit this piece;
+    # None accepts all of them.
+    strike_points: Optional[List[str]] = None
 
 
 class AppConfig(BaseModel):
     camera_id: int = 0
+    camera_background_grab: bool = True
     mode: str = "air"
     midi_enabled: bool = True
     audio_enabled: bool = True
+    audio_engine: str = "sampler"
+    audio_buffer_size: int = 128
+    audio_max_voices: int = 32
+    threaded_pipeline: bool = True
+    pipeline_queue_size: int = 1
+    inference_backend: str = "inprocess"
+    # "mediapipe" tracks hands; "color" and "aruco" track stick-tip markers
+    # instead: tape within the marker_hsv_min..max HSV range, or markers of
+    # aruco_dictionary. At most max_markers are tracked.
+    tracker_backend: str = "mediapipe"
+    marker_hsv_min: List[int] = Field(default_factory=lambda: [40, 80, 80])
+    marker_hsv_max: List[int] = Field(default_factory=lambda: [85, 255, 255])
+    aruco_dictionary: str = "DICT_4X4_50"
+    max_markers: int = 2
+    crop_to_kit: bool = False
+    inference_scale: float = 1.0
+    crop_margin: int = 40
+    # Load governor: lowers model complexity / inference resolution, then
+    # skips frames, while inference exceeds inference_budget_ms. motion_skip
+    # reuses the last hands on frames where nothing moves over the kit.
+    load_governor: bool = False
+    inference_budget_ms: float = 25.0
+    motion_skip: bool = False
+    # Object mode: ROI entries fire only once the ROI's pixels show contact
+    # (frame difference plus optical flow or occlusion).
+    object_impact: bool = False
+    history_size: int = 8
+    # "ema" (fixed-alpha smoother), "one_euro" or "kalman"; filter_params
+    # are passed to the filter's constructor.
+    tracking_filter: str = "ema"
+    filter_params: Dict[str, float] = Field(default_factory=dict)
+    # Points tracked per hand: "index_tip", "wrist", "stick_tip". The first
+    # one stands for the hand in calibration and the UI. stick_length is the
+    # stick tip's distance past the index knuckle, in palm lengths.
+    strike_points: List[str] = Field(default_factory=lambda: ["index_tip"])
+    stick_length: float = 3.0
+    piece_cameras: Dict[str, List[int]] = Field(default_factory=dict)
+    hit_fusion_window_ms: float = 30.0
+    output_latency_ms: float = 0.0
+    predictive_hits: bool = False
+    prediction_horizon_ms: float = 40.0
+    prediction_confirm_ms: float = 50.0
+    learning_seconds: float = 30.0
+    # Performance mode: preview drawn at most render_fps times per second,
+    # downscaled by render_scale. Detection is unaffected.
+    performance_mode: bool = False
+    render_fps: float = 15.0
+    render_scale: float = 0.5
     pieces: Dict[str, PieceConfig]
 
 
@@ -56,6 +113,11 @@ class ConfigManager:
             self.config.pieces[name].threshold_speed = threshold_speed
             self.config.pieces[name].velocity_max = velocity_max
 
+    def camera_ids(self) -> List[int]:
+        extra = {cid for cids in self.config.piece_cameras.values() for cid in cids}
+        extra.discard(self.config.camera_id)
+        return [self.config.camera_id] + sorted(extra)
+
     def set_mode(self, mode: str) -> None:
         self.config.mode = mode
 
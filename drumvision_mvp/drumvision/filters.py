@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import abc
+import logging
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+FilterOutput = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class PointFilter(abc.ABC):
+    """Filters many 2-D points at once, keyed by a stable id per point.
+
+    State lives in slot-indexed arrays so a frame's points are updated in one
+    vectorized step. ``update`` returns filtered positions, velocities and
+    accelerations, each (n, 2), in the order of ``ids``.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self._capacity = 0
+        self._last_t = np.zeros(0)
+
+    def _grow(self, capacity: int) -> None:
+        self._last_t = np.resize(self._last_t, capacity)
+
+    def _lookup(self, ids: List[Hashable]) -> Tuple[np.ndarray, np.ndarray]:
+        """Slot per id, plus a mask of ids seen for the first time."""
+        slots = np.empty(len(ids), int)
+        new = np.zeros(len(ids), bool)
+        for idx, point_id in enumerate(ids):
+            slot = self._slots.get(point_id)
+            if slot is None:
+                if not self._free:
+                    capacity = max(4, 2 * self._capacity)
+                    self._free.extend(range(capacity - 1, self._capacity - 1, -1))
+                    self._grow(capacity)
+                    self._capacity = capacity
+                slot = self._slots[point_id] = self._free.pop()
+                new[idx] = True
+            slots[idx] = slot
+        return slots, new
+
+    def forget(self, ids: List[Hashable]) -> None:
+        for point_id in ids:
+            slot = self._slots.pop(point_id, None)
+            if slot is not None:
+                self._free.append(slot)
+
+    @abc.abstractmethod
+    def update(self, ids: List[Hashable], points: np.ndarray, t: float) -> FilterOutput:
+        """Filtered positions, velocities and accelerations for ``points`` at ``t``."""
+
+
+class OneEuroFilter(PointFilter):
+    """One-Euro filter: heavy smoothing at rest, little lag when moving fast.
+
+    The cutoff rises with the (smoothed) speed; velocity is the smoothed
+    derivative and acceleration the smoothed derivative of that.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.05, d_cutoff: float = 20.0) -> None:
+        super().__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = np.zeros((0, 2))
+        self._dx = np.zeros((0, 2))
+        self._ddx = np.zeros((0, 2))
+
+    def _grow(self, capacity: int) -> None:
+        super()._grow(capacity)
+        self._x = np.resize(self._x, (capacity, 2))
+        self._dx = np.resize(self._dx, (capacity, 2))
+        self._ddx = np.resize(self._ddx, (capacity, 2))
+
+    @staticmethod
+    def _alpha(cutoff: np.ndarray, dt: np.ndarray) -> np.ndarray:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, ids: List[Hashable], points: np.ndarray, t: float) -> FilterOutput:
+        points = np.asarray(points, float).reshape(-1, 2)
+        slots, new = self._lookup(ids)
+        if new.any():
+            fresh = slots[new]
+            self._x[fresh] = points[new]
+            self._dx[fresh] = 0.0
+            self._ddx[fresh] = 0.0
+            self._last_t[fresh] = t
+        dt = np.maximum(t - self._last_t[slots], 1e-6)[:, None]
+        x_prev, dx_prev = self._x[slots], self._dx[slots]
+        a_d = self._alpha(np.full_like(dt, self.d_cutoff), dt)
+        dx = np.where(new[:, None], 0.0, a_d * (points - x_prev) / dt + (1 - a_d) * dx_prev)
+        speed = np.linalg.norm(dx, axis=1, keepdims=True)
+        a = self._alpha(self.min_cutoff + self.beta * speed, dt)
+        x = a * points + (1 - a) * x_prev
+        ddx = np.where(new[:, None], 0.0, a_d * (dx - dx_prev) / dt + (1 - a_d) * self._ddx[slots])
+        self._x[slots], self._dx[slots], self._ddx[slots] = x, dx, ddx
+        self._last_t[slots] = t
+        return x, dx, ddx
+
+
+class KalmanFilter(PointFilter):
+    """Constant-acceleration Kalman filter, x and y as independent axes.
+
+    State per axis is (position, velocity, acceleration) driven by white
+    jerk noise of spectral density ``process_noise`` (px^2/s^5);
+    measurements are positions with ``measurement_noise`` px std.
+    """
+
+    def __init__(self, process_noise: float = 1e8, measurement_noise: float = 2.0) -> None:
+        super().__init__()
+        self.q = process_noise
+        self.r = measurement_noise**2
+        self._state = np.zeros((0, 2, 3))
+        self._cov = np.zeros((0, 2, 3, 3))
+
+    def _grow(self, capacity: int) -> None:
+        super()._grow(capacity)
+        self._state = np.resize(self._state, (capacity, 2, 3))
+        self._cov = np.resize(self._cov, (capacity, 2, 3, 3))
+
+    def update(self, ids: List[Hashable], points: np.ndarray, t: float) -> FilterOutput:
+        points = np.asarray(points, float).reshape(-1, 2)
+        slots, new = self._lookup(ids)
+        if new.any():
+            fresh = slots[new]
+            self._state[fresh] = 0.0
+            self._state[fresh, :, 0] = points[new]
+            # Unknown motion: generous velocity/acceleration uncertainty.
+            self._cov[fresh] = np.diag([self.r, 1e6, 1e8])
+            self._last_t[fresh] = t
+        dt = np.maximum(t - self._last_t[slots], 0.0)
+        n = len(slots)
+        F = np.tile(np.eye(3), (n, 1, 1))
+        F[:, 0, 1] = dt
+        F[:, 0, 2] = 0.5 * dt**2
+        F[:, 1, 2] = dt
+        Q = self.q * np.stack(
+            [
+                np.stack([dt**5 / 20, dt**4 / 8, dt**3 / 6], axis=1),
+                np.stack([dt**4 / 8, dt**3 / 3, dt**2 / 2], axis=1),
+                np.stack([dt**3 / 6, dt**2 / 2, dt], axis=1),
+            ],
+            axis=1,
+        )
+        # Predict (both axes share F and Q).
+        state = np.einsum("nij,naj->nai", F, self._state[slots])
+        cov = np.einsum("nij,najk,nlk->nail", F, self._cov[slots], F) + Q[:, None]
+        # Update with the position measurement (H = [1, 0, 0]).
+        innovation = points - state[:, :, 0]
+        s = cov[:, :, 0, 0] + self.r
+        gain = cov[:, :, :, 0] / s[:, :, None]
+        state = state + gain * innovation[:, :, None]
+        cov = cov - gain[:, :, :, None] * cov[:, :, 0, None, :]
+        self._state[slots], self._cov[slots] = state, cov
+        self._last_t[slots] = t
+        return state[:, :, 0], state[:, :, 1], state[:, :, 2]
+
+
+def create_filter(name: str, params: Optional[Dict[str, float]] = None) -> Optional[PointFilter]:
+    """None selects the tracker's built-in fixed-alpha smoother."""
+    params = params or {}
+    if name == "one_euro":
+        return OneEuroFilter(**params)
+    if name == "kalman":
+        return KalmanFilter(**params)
+    if name != "ema":
+        logging.warning("Unknown tracking filter %s, using ema", name)
+    return None
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Pad circles (x, y, radius) and ROI rectangles (x1, y1, x2, y2).
+KitRegions = Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int, int]]]
+
+
+@dataclass(frozen=True)
+class LoadLevel:
+    model_complexity: int
+    # Multiplies the configured inference_scale.
+    scale: float
+    # Low min_tracking_confidence: MediaPipe keeps following last frame's
+    # landmarks instead of re-running palm detection whenever they wobble.
+    tracking_only: bool = False
+    # Inference runs on every n-th frame; the others reuse the last hands.
+    stride: int = 1
+
+    def describe(self) -> str:
+        parts = [f"complexity {self.model_complexity}", f"scale x{self.scale:g}"]
+        if self.tracking_only:
+            parts.append("tracking only")
+        if self.stride > 1:
+            parts.append(f"every {self.stride} frames")
+        return ", ".join(parts)
+
+
+# Cheapest last; each step trades a little accuracy for inference time.
+LEVELS = (
+    LoadLevel(1, 1.0),
+    LoadLevel(0, 1.0),
+    LoadLevel(0, 0.75),
+    LoadLevel(0, 0.75, tracking_only=True),
+    LoadLevel(0, 0.5, tracking_only=True),
+    LoadLevel(0, 0.5, tracking_only=True, stride=2),
+)
+TRACKING_ONLY_CONFIDENCE = 0.2
+# Smoothing of the per-frame inference time, and the minimum time (s) at a
+# level before moving again, so one slow frame or a model reload does not
+# make the governor oscillate.
+EMA_ALPHA = 0.1
+DWELL_SECONDS = 2.0
+# Step back up once inference fits well within the budget, unless the level
+# above was measured over budget less than REPROBE_SECONDS ago.
+RELAX_RATIO = 0.6
+REPROBE_SECONDS = 30.0
+# Motion check: the kit region is downsampled to about this width (averaging away
+# sensor noise); movement is at least MOTION_MIN_PIXELS thumbnail pixels whose
+# grey level changed by more than MOTION_PIXEL_DELTA. A few pixels is roughly
+# a fingertip.
+MOTION_WIDTH = 80
+MOTION_PIXEL_DELTA = 15
+MOTION_MIN_PIXELS = 3
+# Hands carried through gated frames keep this share of their velocity per
+# frame, so a hand that stopped reads as slowing down rather than frozen
+# mid-stroke.
+VELOCITY_DECAY = 0.5
+# Distance (px) between a carried and a re-detected hand that counts as
+# motion the gate missed.
+SURPRISE_PX = 20.0
+# Inference still runs at least this often with no motion, so hands that
+# appear without crossing the kit are picked up.
+MAX_IDLE_FRAMES = 15
+
+
+class LoadGovernor:
+    """Steps through LEVELS to keep inference time within a budget."""
+
+    def __init__(self, budget_ms: float, levels: Tuple[LoadLevel, ...] = LEVELS) -> None:
+        self.budget_ms = budget_ms
+        self.levels = levels
+        self.index = 0
+        self.ema_ms: Optional[float] = None
+        self._changed = 0.0
+        # Level -> (inference ms when it was left, when).
+        self._costs: Dict[int, Tuple[float, float]] = {}
+
+    @property
+    def level(self) -> LoadLevel:
+        return self.levels[self.index]
+
+    def update(self, infer_ms: float, now: float) -> Optional[LoadLevel]:
+        """Feeds one inference time; returns the new level when it changes."""
+        if self.ema_ms is None:
+            self.ema_ms = infer_ms
+            self._changed = now
+        self.ema_ms += EMA_ALPHA * (infer_ms - self.ema_ms)
+        if now - self._changed < DWELL_SECONDS:
+            return None
+        step = 0
+        if self.ema_ms > self.budget_ms and self.index < len(self.levels) - 1:
+            step = 1
+        elif self.ema_ms < RELAX_RATIO * self.budget_ms and self.index > 0:
+            cost, when = self._costs.get(self.index - 1, (0.0, 0.0))
+            if cost <= self.budget_ms or now - when > REPROBE_SECONDS:
+                step = -1
+        if not step:
+            return None
+        self._costs[self.index] = (self.ema_ms, now)
+        self.index += step
+        self._changed = now
+        logging.info(
+            "Load governor: level %d (%s); inference was %.1f ms, budget %.1f ms",
+            self.index,
+            self.level.describe(),
+            self.ema_ms,
+            self.budget_ms,
+        )
+        # The new level's cost is unknown; measure it afresh.
+        self.ema_ms = None
+        return self.level
+
+
+@dataclass
+class GateStats:
+    """How much inference the motion gate skipped, and whether it hurt.
+
+    A "surprise" is a hand found over a pad, on a periodic refresh the gate
+    did not ask for, more than SURPRISE_PX from where it was carried, i.e.
+    motion the gate missed where it matters.
+    """
+
+    checked: int = 0
+    gated: int = 0
+    check_ms: float = 0.0
+    # Running average of one inference, to price the skipped ones.
+    infer_ms: float = 0.0
+    surprises: int = 0
+
+    def add_inference(self, ms: float) -> None:
+        self.infer_ms = ms if self.infer_ms == 0.0 else self.infer_ms + EMA_ALPHA * (ms - self.infer_ms)
+
+    @property
+    def saved_ms(self) -> float:
+        return self.gated * self.infer_ms - self.check_ms
+
+    def summary(self) -> str:
+        share = 100.0 * self.gated / max(self.checked, 1)
+        check = self.check_ms / max(self.checked, 1)
+        return (
+            f"gated {self.gated}/{self.checked} frames ({share:.0f}%), "
+            f"saved ~{self.saved_ms / 1000:.1f} s CPU, check {check:.2f} ms/frame, surprises {self.surprises}"
+        )
+
+
+class MotionCheck:
+    """Tells whether anything moved over the kit since the last call.
+
+    Works on a small grey thumbnail of the kit's bounding box, counting only
+    pixels inside the pads (circles and ROIs, grown by a margin), so it costs
+    a fraction of a millisecond against the tens spent in MediaPipe.
+    """
+
+    def __init__(self, pixel_delta: int = MOTION_PIXEL_DELTA, width: int = MOTION_WIDTH) -> None:
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.stats = GateStats()
+        self._regions: Optional[KitRegions] = None
+        self._margin = 0
+        self._previous: Optional[np.ndarray] = None
+        self._key: Optional[tuple] = None
+        self._box = (0, 0, 0, 0)
+        self._size = (1, 1)
+        self._mask: Optional[np.ndarray] = None
+
+    def set_regions(self, regions: Optional[KitRegions], margin: int = 0) -> None:
+        """Pads to watch, in frame pixels; None watches the whole frame."""
+        self._regions = regions
+        self._margin = margin
+        self._key = None
+
+    def _layout(self, height: int, width: int) -> None:
+        circles, rects = self._regions or ([], [])
+        m = self._margin
+        boxes = [(x - r - m, y - r - m, x + r + m, y + r + m) for x, y, r in circles]
+        boxes += [(x1 - m, y1 - m, x2 + m, y2 + m) for x1, y1, x2, y2 in rects]
+        if boxes:
+            x1 = max(0, int(min(box[0] for box in boxes)))
+            y1 = max(0, int(min(box[1] for box in boxes)))
+            x2 = min(width, int(max(box[2] for box in boxes)))
+            y2 = min(height, int(max(box[3] for box in boxes)))
+        if not boxes or x2 <= x1 or y2 <= y1:
+            x1, y1, x2, y2 = 0, 0, width, height
+        # An integer shrink factor keeps INTER_AREA on its fast path (several
+        # times cheaper than an arbitrary ratio).
+        factor = max(1, (x2 - x1) // self.width)
+        size = (max(1, (x2 - x1) // factor), max(1, (y2 - y1) // factor))
+        x2, y2 = x1 + size[0] * factor, y1 + size[1] * factor
+        self._box = (x1, y1, x2, y2)
+        self._size = size
+        self._mask = None
+        if boxes:
+            # Drawn straight at thumbnail scale.
+            sx, sy = size[0] / (x2 - x1), size[1] / (y2 - y1)
+            mask = np.zeros((size[1], size[0]), np.uint8)
+            for x, y, r in circles:
+                center = (int((x - x1) * sx), int((y - y1) * sy))
+                cv2.circle(mask, center, max(1, int(np.ceil((r + m) * sx))), 255, -1)
+            for rx1, ry1, rx2, ry2 in rects:
+                corner1 = (int((rx1 - m - x1) * sx), int((ry1 - m - y1) * sy))
+                corner2 = (int(np.ceil((rx2 + m - x1) * sx)), int(np.ceil((ry2 + m - y1) * sy)))
+                cv2.rectangle(mask, corner1, corner2, 255, -1)
+            self._mask = mask
+
+    def watches(self, x: float, y: float) -> bool:
+        """Whether a frame pixel lies in the watched area."""
+        x1, y1, x2, y2 = self._box
+        if not (x1 <= x < x2 and y1 <= y < y2):
+            return False
+        if self._mask is None:
+            return True
+        col = int((x - x1) * self._size[0] / (x2 - x1))
+        row = int((y - y1) * self._size[1] / (y2 - y1))
+        return bool(self._mask[row, col])
+
+    def moving(self, frame: np.ndarray) -> bool:
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        key = (height, width)
+        fresh = key != self._key
+        if fresh:
+            self._key = key
+            self._layout(height, width)
+        x1, y1, x2, y2 = self._box
+        patch = cv2.resize(frame[y1:y2, x1:x2], self._size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+        previous, self._previous = self._previous, thumb
+        if fresh or previous is None:
+            moved = True
+        else:
+            changed = cv2.compare(cv2.absdiff(thumb, previous), self.pixel_delta, cv2.CMP_GT)
+            if self._mask is not None:
+                changed = cv2.bitwise_and(changed, self._mask)
+            moved = cv2.countNonZero(changed) >= MOTION_MIN_PIXELS
+        self.stats.checked += 1
+        self.stats.check_ms += (time.perf_counter() - start) * 1000
+        return moved
+
+
+def level_settings(base: dict, level: LoadLevel) -> dict:
+    settings = dict(base, model_complexity=min(base["model_complexity"], level.model_complexity))
+    if level.tracking_only:
+        settings["min_tracking_confidence"] = min(base["min_tracking_confidence"], TRACKING_ONLY_CONFIDENCE)
+    return settings
+
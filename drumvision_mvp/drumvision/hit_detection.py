@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import itertools
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
-from .kit import DrumKit, KitPiece
+import numpy as np
+
+from .impact import ImpactDetector
+from .kit import DrumKit, KitIndex, KitPiece
 from .tracking import HandState
 from .utils import clamp
 
 
-@dataclass
+_hit_ids = itertools.count(1)
+# Recent hits that fusion and the outputs keep cancellable by id; a cancel
+# follows its prediction within the confirm window, so this is plenty.
+CANCELLABLE_HITS = 64
+
+
+@dataclass(slots=True)
 class HitEvent:
     piece_name: str
     midi_note: int
@@ -17,20 +27,199 @@ class HitEvent:
     timestamp: float
     hand_id: int
     confidence: float
+    predicted: bool = False
+    cancelled: bool = False
+    # Unique per fired hit; a cancel carries the id of the prediction it
+    # retracts, so fusion and outputs can find that exact hit.
+    hit_id: int = field(default_factory=lambda: next(_hit_ids))
+
+
+# Future points sampled per hand when looking ahead for an impact.
+PREDICTION_SAMPLES = 8
+# Rows of hands unseen for this long (s) are dropped. Longer than the
+# tracker's TRACK_TTL, so a track is always retired there first.
+STALE_HAND_SECONDS = 0.5
 
 
 class HitDetector:
-    def __init__(self) -> None:
-        self.inside_state: Dict[Tuple[int, str], bool] = {}
-        self.armed_state: Dict[Tuple[int, str], bool] = {}
-
-    def _inside_piece(self, piece: KitPiece, point: Tuple[int, int], mode: str) -> bool:
-        if mode == "object" and piece.roi:
-            x1, y1, x2, y2 = piece.roi
-            return x1 <= point[0] <= x2 and y1 <= point[1] <= y2
-        dx = point[0] - piece.position[0]
-        dy = point[1] - piece.position[1]
-        return dx * dx + dy * dy <= piece.radius * piece.radius
+    """Evaluates every hand against every piece in one NumPy pass.
+
+    Pad containment comes from the kit's spatial index and thresholds live in
+    arrays, both rebuilt only when the kit's revision (or the mode) changes;
+    per (hand, piece) inside/armed flags live in boolean matrices with one row
+    per (hand id, strike point). Each strike point of a hand is evaluated on
+    its own, but entry, arming and confirmation are per hand: once any point
+    fires a piece, none of the hand's points can fire it again until the
+    whole hand has left it. A piece's ``strike_points`` restricts which
+    points can hit it.
+
+    With an ``impact`` detector and the frame, an object-mode ROI entry only
+    fires once the ROI's pixels show contact; until then the entry is held
+    back (not marked inside) so it can still fire on a later frame.
+    """
+
+    def __init__(
+        self,
+        predictive: bool = False,
+        horizon_ms: float = 40.0,
+        confirm_ms: float = 50.0,
+        impact: Optional[ImpactDetector] = None,
+    ) -> None:
+        self.predictive = predictive
+        self.impact = impact
+        self.horizon = horizon_ms / 1000.0
+        self.confirm = confirm_ms / 1000.0
+        # (row, col) -> (event, deadline, cooldown stamp before the prediction)
+        self._pending: Dict[Tuple[int, int], Tuple[HitEvent, float, float]] = {}
+        self.names: List[str] = []
+        self._pieces: List[KitPiece] = []
+        self._kit_key: Optional[Tuple[int, int, str]] = None
+        self._rows: Dict[Tuple[int, str], int] = {}
+        self._inside = np.zeros((0, 0), bool)
+        self._armed = np.ones((0, 0), bool)
+        self._seen = np.zeros(0)
+        # Cooldown is tracked per detector so that several cameras watching the
+        # same piece each report their own candidate for fusion.
+        self._last_hit = np.zeros(0)
+        self._index: Optional[KitIndex] = None
+        self._threshold = np.zeros(0)
+        self._cooldown = np.zeros(0)
+        self._rearm = np.zeros(0)
+        # Strike point name -> pieces it may hit, built on demand per kit.
+        self._accepts: Dict[str, np.ndarray] = {}
+
+    @property
+    def inside_state(self) -> Dict[Tuple[int, str], bool]:
+        return self._as_dict(self._inside)
+
+    @property
+    def armed_state(self) -> Dict[Tuple[int, str], bool]:
+        return self._as_dict(self._armed)
+
+    @property
+    def last_hit(self) -> Dict[str, float]:
+        return dict(zip(self.names, self._last_hit.tolist()))
+
+    def _as_dict(self, matrix: np.ndarray) -> Dict[Tuple[int, str], bool]:
+        # Per hand: true if any of its strike points is.
+        result: Dict[Tuple[int, str], bool] = {}
+        for (hand_id, _), row in self._rows.items():
+            for col, name in enumerate(self.names):
+                result[(hand_id, name)] = result.get((hand_id, name), False) or bool(matrix[row, col])
+        return result
+
+    def _sync(self, kit: DrumKit, mode: str) -> None:
+        key = (id(kit), kit.revision, mode)
+        if key == self._kit_key:
+            return
+        self._kit_key = key
+        pieces = kit.list_pieces()
+        names = [piece.name for piece in pieces]
+        if names != self.names:
+            # Carry state over by piece name so a reload does not re-arm or
+            # re-trigger pads that did not change.
+            old = {name: col for col, name in enumerate(self.names)}
+            take = np.array([old.get(name, -1) for name in names], dtype=int)
+            kept = take >= 0
+            inside = np.zeros((len(self._rows), len(names)), bool)
+            armed = np.ones((len(self._rows), len(names)), bool)
+            last_hit = np.zeros(len(names))
+            inside[:, kept] = self._inside[:, take[kept]]
+            armed[:, kept] = self._armed[:, take[kept]]
+            last_hit[kept] = self._last_hit[take[kept]]
+            self._inside, self._armed, self._last_hit = inside, armed, last_hit
+            self.names = names
+            self._pending.clear()
+        self._pieces = pieces
+        self._index = kit.index(mode)
+        self._threshold = np.array([piece.threshold_speed for piece in pieces], float)
+        self._cooldown = np.array([piece.cooldown_ms for piece in pieces], float)
+        self._rearm = np.array([piece.rearm_ratio * piece.threshold_speed for piece in pieces], float)
+        self._accepts = {}
+
+    def _accepted(self, point: str) -> np.ndarray:
+        accepts = self._accepts.get(point)
+        if accepts is None:
+            accepts = self._accepts[point] = np.array(
+                [piece.strike_points is None or point in piece.strike_points for piece in self._pieces], bool
+            )
+        return accepts
+
+    def _row(self, key: Tuple[int, str]) -> int:
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._rows)
+            self._rows[key] = row
+            cols = len(self.names)
+            self._inside = np.vstack([self._inside, np.zeros((1, cols), bool)])
+            self._armed = np.vstack([self._armed, np.ones((1, cols), bool)])
+            self._seen = np.append(self._seen, 0.0)
+        return row
+
+    def _drop(self, keys: List[Tuple[int, str]]) -> None:
+        dropped = {self._rows.pop(key) for key in keys}
+        if not dropped:
+            return
+        keep = [row for row in range(len(self._seen)) if row not in dropped]
+        remap = {old: new for new, old in enumerate(keep)}
+        self._inside = self._inside[keep]
+        self._armed = self._armed[keep]
+        self._seen = self._seen[keep]
+        self._rows = {key: remap[row] for key, row in self._rows.items()}
+        self._pending = {(remap[row], col): entry for (row, col), entry in self._pending.items() if row in remap}
+
+    @staticmethod
+    def _per_hand(matrix: np.ndarray, owner: np.ndarray) -> np.ndarray:
+        """Per-point rows -> whether any point of the same hand is set."""
+        hands = np.zeros((int(owner.max()) + 1 if len(owner) else 0, matrix.shape[1]), bool)
+        np.logical_or.at(hands, owner, matrix)
+        return hands[owner]
+
+    def _hold_pending(self) -> None:
+        # Awaiting confirmation; no point of the hand may re-arm just for
+        # being outside.
+        hand_of = {row: key[0] for key, row in self._rows.items()}
+        held = {(hand_of[row], col) for row, col in self._pending}
+        for (hand_id, _), row in self._rows.items():
+            for held_id, col in held:
+                if held_id == hand_id:
+                    self._armed[row, col] = False
+
+    def _forget_stale(self, now: float) -> None:
+        # Hands with a pending prediction stay until it resolves, so a
+        # vanished hand still gets its cancel.
+        pending_rows = {row for row, _ in self._pending}
+        stale = [
+            key
+            for key, row in self._rows.items()
+            if now - self._seen[row] > STALE_HAND_SECONDS and row not in pending_rows
+        ]
+        if stale:
+            self._drop(stale)
+
+    def _impact(self, hand: HandState, col: int) -> Tuple[float, float]:
+        # Frame-quantized time and two-point speed, unless the history allows
+        # locating the boundary crossing between frames.
+        if hand.history is None:
+            return hand.timestamp, hand.v_mag
+        index = self._index
+        if index.use_roi[col]:
+            x1, y1, x2, y2 = index.rois[col]
+
+            def inside(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+                return (x1 <= xs) & (xs <= x2) & (y1 <= ys) & (ys <= y2)
+
+        else:
+            cx, cy = index.centers[col]
+            r_sq = index.radius_sq[col]
+
+            def inside(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+                return (xs - cx) ** 2 + (ys - cy) ** 2 <= r_sq
+
+        impact = hand.history.crossing(inside)
+        if impact is None:
+            return hand.timestamp, hand.v_mag
+        return impact
 
     def _velocity_to_midi(self, piece: KitPiece, v_mag: float) -> int:
         min_v = piece.threshold_speed
@@ -39,40 +228,180 @@ class HitDetector:
         vel = int(1 + 126 * (v_mag - min_v) / (max_v - min_v))
         return int(clamp(vel, 1, 127))
 
-    def process(self, hands: List[HandState], kit: DrumKit, mode: str) -> List[HitEvent]:
+    def _resolve_predictions(
+        self, hands: List[HandState], rows: np.ndarray, inside: np.ndarray, now: float
+    ) -> List[HitEvent]:
+        cancelled: List[HitEvent] = []
+        by_row = {int(row): idx for idx, row in enumerate(rows)}
+        for (row, col), (event, deadline, prev_hit) in list(self._pending.items()):
+            idx = by_row.get(row)
+            if idx is not None and inside[idx, col]:
+                del self._pending[(row, col)]
+                continue
+            reversed_stroke = idx is not None and hands[idx].v_y < 0
+            if not reversed_stroke and now <= deadline:
+                continue
+            # Misprediction: hand out the cancel so outputs can retract the
+            # note, and re-arm so a late real entry still fires normally.
+            del self._pending[(row, col)]
+            self._armed[row, col] = True
+            self._last_hit[col] = prev_hit
+            self._pieces[col].last_hit_ts = prev_hit
+            cancelled.append(
+                HitEvent(
+                    piece_name=event.piece_name,
+                    midi_note=event.midi_note,
+                    velocity=event.velocity,
+                    timestamp=now,
+                    hand_id=event.hand_id,
+                    confidence=event.confidence,
+                    predicted=True,
+                    cancelled=True,
+                    hit_id=event.hit_id,
+                )
+            )
+        return cancelled
+
+    def _predict(
+        self, hands: List[HandState], rows: np.ndarray, candidates: np.ndarray, now: float
+    ) -> List[HitEvent]:
+        events: List[HitEvent] = []
+        hand_idx = [idx for idx in np.nonzero(candidates.any(axis=1))[0] if hands[idx].history is not None]
+        fits = [(idx, hands[idx].history.trajectory()) for idx in hand_idx]
+        fits = [(idx, fit) for idx, fit in fits if fit is not None]
+        if not fits:
+            return events
+        # Extrapolate each trajectory (velocity plus acceleration from the
+        # quadratic fit) over the horizon and test every sample against every
+        # pad in one batch.
+        t = np.linspace(self.horizon / PREDICTION_SAMPLES, self.horizon, PREDICTION_SAMPLES)
+        future = np.stack(
+            [np.stack([np.polyval(cx, t), np.polyval(cy, t)], axis=1) for _, (_, cx, cy) in fits]
+        )
+        entering = self._index.contains(future.reshape(-1, 2)).reshape(len(fits), PREDICTION_SAMPLES, -1)
+        will_enter = entering.any(axis=1)
+        first_sample = entering.argmax(axis=1)
+        fits_idx = np.array([idx for idx, _ in fits])
+        fire = candidates[fits_idx] & will_enter
+        fire &= np.cumsum(fire, axis=0) == 1
+        for fit_row, col in zip(*np.nonzero(fire)):
+            idx = int(fits_idx[fit_row])
+            t_last, cx, cy = fits[fit_row][1]
+            t_hit = float(t[first_sample[fit_row, col]])
+            speed = float(np.hypot(np.polyval(np.polyder(cx), t_hit), np.polyval(np.polyder(cy), t_hit)))
+            piece = self._pieces[col]
+            event = HitEvent(
+                piece_name=piece.name,
+                midi_note=piece.midi_note,
+                velocity=self._velocity_to_midi(piece, speed),
+                timestamp=t_last + t_hit,
+                hand_id=hands[idx].hand_id,
+                confidence=1.0,
+                predicted=True,
+            )
+            row = int(rows[idx])
+            self._pending[(row, col)] = (event, t_last + t_hit + self.confirm, float(self._last_hit[col]))
+            self._armed[row, col] = False
+            piece.last_hit_ts = now
+            self._last_hit[col] = now
+            events.append(event)
+        return events
+
+    def process(
+        self,
+        hands: List[HandState],
+        kit: DrumKit,
+        mode: str,
+        now: Optional[float] = None,
+        frame: Optional[np.ndarray] = None,
+    ) -> List[HitEvent]:
+        # Replays pass the frame's timestamp so cooldowns and prediction
+        # deadlines follow the recording, not the wall clock.
+        self._sync(kit, mode)
+        contact: Optional[np.ndarray] = None
+        if self.impact is not None and frame is not None and mode == "object":
+            # Runs on every frame, hands or not, to keep its frame and
+            # background references current.
+            contact = self.impact.update(frame, kit)
+        if not self.names:
+            return []
+        now = time.monotonic() if now is None else now
+        if not hands and not self._pending:
+            # Rows of hands that left are still retired on empty frames.
+            if self._rows:
+                self._forget_stale(now)
+            return []
+        # From here on every strike point is a "hand" of its own; ``owner``
+        # groups the points of each real hand.
+        hands = [point for hand in hands for point in (hand.points or [hand])]
+        owner = np.unique(np.array([hand.hand_id for hand in hands], int), return_inverse=True)[1].reshape(-1)
+        rows = np.array([self._row((hand.hand_id, hand.point)) for hand in hands], dtype=int)
+        self._seen[rows] = now
+        points = np.array([hand.position for hand in hands], float).reshape(-1, 2)
+        v_y = np.array([hand.v_y for hand in hands], float)[:, None]
+
+        inside = self._index.contains(points)
+        if hands:
+            # A point that may not hit a piece is never inside it.
+            inside &= np.array([self._accepted(hand.point) for hand in hands])
+        hand_inside = self._per_hand(inside, owner)
         events: List[HitEvent] = []
-        now = time.time()
-        for hand in hands:
-            for piece in kit.list_pieces():
-                key = (hand.hand_id, piece.name)
-                inside = self._inside_piece(piece, hand.strike_point, mode)
-                was_inside = self.inside_state.get(key, False)
-                armed = self.armed_state.get(key, True)
-
-                if not armed:
-                    if not inside or hand.v_y < -0.5 * piece.threshold_speed:
-                        self.armed_state[key] = True
-                    self.inside_state[key] = inside
-                    continue
-
-                cooldown_ok = (now - piece.last_hit_ts) * 1000 >= piece.cooldown_ms
-                downstroke_ok = hand.v_y > piece.threshold_speed
-                entered = not was_inside and inside
-
-                if entered and cooldown_ok and downstroke_ok:
-                    velocity = self._velocity_to_midi(piece, hand.v_mag)
-                    events.append(
-                        HitEvent(
-                            piece_name=piece.name,
-                            midi_note=piece.midi_note,
-                            velocity=velocity,
-                            timestamp=now,
-                            hand_id=hand.hand_id,
-                            confidence=1.0,
-                        )
-                    )
-                    piece.last_hit_ts = now
-                    self.armed_state[key] = False
-
-                self.inside_state[key] = inside
+        if self._pending:
+            events.extend(self._resolve_predictions(hands, rows, hand_inside, now))
+        if not hands:
+            return events
+        was_inside = self._per_hand(self._inside[rows], owner)
+        armed = self._armed[rows]
+
+        rearm = ~hand_inside | (v_y < -self._rearm[None, :])
+        downstroke = v_y > self._threshold[None, :]
+        cooldown_ok = (now - self._last_hit) * 1000 >= self._cooldown
+        fire = armed & ~was_inside & inside & downstroke & cooldown_ok[None, :]
+        # A hit restarts the piece's cooldown, so with a non-zero cooldown only
+        # the first hand (in input order) may fire a piece per frame.
+        first = np.cumsum(fire, axis=0) == 1
+        fire &= first | (self._cooldown[None, :] <= 0)
+        if len(owner) > owner.max() + 1:
+            # Several points per hand: one hit per hand and piece.
+            fired = set()
+            for idx, col in zip(*np.nonzero(fire)):
+                if (owner[idx], col) in fired:
+                    fire[idx, col] = False
+                fired.add((owner[idx], col))
+        if contact is not None:
+            held = fire & ~contact[None, :]
+            fire &= ~held
+            self._inside[rows] = inside & ~held
+        else:
+            self._inside[rows] = inside
+        self._armed[rows] = ~self._per_hand(fire, owner) & (armed | rearm)
+        if self._pending:
+            self._hold_pending()
+
+        for hand_idx, col in zip(*np.nonzero(fire)):
+            hand = hands[hand_idx]
+            piece = self._pieces[col]
+            impact_ts, impact_speed = self._impact(hand, col)
+            events.append(
+                HitEvent(
+                    piece_name=piece.name,
+                    midi_note=piece.midi_note,
+                    velocity=self._velocity_to_midi(piece, impact_speed),
+                    timestamp=impact_ts,
+                    hand_id=hand.hand_id,
+                    confidence=1.0,
+                )
+            )
+            piece.last_hit_ts = now
+            self._last_hit[col] = now
+
+        if self.predictive:
+            cooldown_ok = (now - self._last_hit) * 1000 >= self._cooldown
+            candidates = self._armed[rows] & ~inside & downstroke & cooldown_ok[None, :]
+            if candidates.any():
+                events.extend(self._predict(hands, rows, candidates, now))
+                if self._pending:
+                    self._hold_pending()
+        if len(self._rows) > len(hands):
+            self._forget_stale(now)
         return events
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .kit import DrumKit
+
+# Every ROI is resampled to a PATCH x PATCH tile; the tiles are stacked into
+# one mosaic so differencing, optical flow and background checks run once per
+# frame over all objects.
+PATCH = 32
+# Per-ROI thresholds: mean absolute grey-level change between frames, mean
+# optical-flow magnitude (px per frame at tile scale) and the share of tile
+# pixels differing from the learnt background.
+ENERGY_THRESHOLD = 4.0
+FLOW_THRESHOLD = 0.4
+OCCLUSION_THRESHOLD = 0.25
+OCCLUSION_DELTA = 25
+# Background adaptation rate, applied only to tiles that look unoccluded.
+BACKGROUND_RATE = 0.05
+# A contact counts for this many frames, since the pixels may react a frame
+# before the landmarks cross into the ROI.
+CONTACT_FRAMES = 2
+
+
+class ImpactDetector:
+    """Pixel evidence of real contact inside object-mode ROIs.
+
+    Landmarks alone cannot tell a stroke that lands on the object from one
+    that stops a few centimetres short (or landmark jitter across an ROI
+    edge). A contact shows up in the ROI's own pixels: they change (energy),
+    move coherently (flow) and stop looking like the empty object
+    (occlusion). ``update`` returns, per kit piece, whether the last frames
+    showed such a contact; pieces without an ROI are always True.
+    """
+
+    def __init__(self) -> None:
+        self._kit_key: Optional[Tuple[int, int]] = None
+        self._rois = np.zeros((0, 4), int)
+        self._cols = np.zeros(0, int)
+        self._count = 0
+        self._mosaic = np.zeros((0, PATCH, 3), np.uint8)
+        self._previous: Optional[np.ndarray] = None
+        self._background: Optional[np.ndarray] = None
+        self._recent = np.zeros((CONTACT_FRAMES, 0), bool)
+        self.energy = np.zeros(0)
+        self.flow = np.zeros(0)
+        self.occlusion = np.zeros(0)
+
+    def _sync(self, kit: DrumKit) -> None:
+        key = (id(kit), kit.revision)
+        if key == self._kit_key:
+            return
+        self._kit_key = key
+        pieces = kit.list_pieces()
+        self._count = len(pieces)
+        self._cols = np.array([col for col, piece in enumerate(pieces) if piece.roi], int)
+        self._rois = np.array([piece.roi for piece in pieces if piece.roi], int).reshape(-1, 4)
+        self._mosaic = np.zeros((len(self._cols) * PATCH, PATCH, 3), np.uint8)
+        self._previous = None
+        self._background = None
+        self._recent = np.zeros((CONTACT_FRAMES, len(self._cols)), bool)
+
+    def update(self, frame: np.ndarray, kit: DrumKit) -> np.ndarray:
+        self._sync(kit)
+        active = np.ones(self._count, bool)
+        if not len(self._cols):
+            return active
+        height, width = frame.shape[:2]
+        for tile, (x1, y1, x2, y2) in enumerate(self._rois):
+            x1, x2 = np.clip((x1, x2), 0, width)
+            y1, y2 = np.clip((y1, y2), 0, height)
+            target = self._mosaic[tile * PATCH : (tile + 1) * PATCH]
+            if x2 - x1 < 1 or y2 - y1 < 1:
+                target[:] = 0
+                continue
+            cv2.resize(frame[y1:y2, x1:x2], (PATCH, PATCH), dst=target, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(self._mosaic, cv2.COLOR_BGR2GRAY)
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            self._background = gray.astype(np.float32)
+            return active
+        tiles = len(self._cols)
+        diff = cv2.absdiff(gray, previous)
+        self.energy = diff.reshape(tiles, -1).mean(axis=1)
+        away = np.abs(gray.astype(np.float32) - self._background) > OCCLUSION_DELTA
+        self.occlusion = away.reshape(tiles, -1).mean(axis=1)
+        # Learn the empty object only where nothing covers it.
+        clear = np.repeat(self.occlusion < OCCLUSION_THRESHOLD, PATCH)
+        self._background[clear] += BACKGROUND_RATE * (gray[clear] - self._background[clear])
+
+        # Changed pixels alone could be a lighting flicker; require them to
+        # move or to cover the object too. Flow is the costly part, so it only
+        # runs, in one call, on the tiles where it decides the outcome.
+        changed = self.energy >= ENERGY_THRESHOLD
+        contact = changed & (self.occlusion >= OCCLUSION_THRESHOLD)
+        self.flow = np.zeros(tiles)
+        undecided = np.flatnonzero(changed & ~contact)
+        if len(undecided):
+            rows = (undecided[:, None] * PATCH + np.arange(PATCH)).ravel()
+            flow = cv2.calcOpticalFlowFarneback(previous[rows], gray[rows], None, 0.5, 1, 9, 2, 5, 1.1, 0)
+            self.flow[undecided] = np.hypot(flow[..., 0], flow[..., 1]).reshape(len(undecided), -1).mean(axis=1)
+            contact[undecided] = self.flow[undecided] >= FLOW_THRESHOLD
+        self._recent = np.roll(self._recent, 1, axis=0)
+        self._recent[0] = contact
+        active[self._cols] = self._recent.any(axis=0)
+        return active
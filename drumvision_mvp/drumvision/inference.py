@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp_proc
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+NUM_LANDMARKS = 21
+HANDEDNESS_LABELS = ("Left", "Right")
+
+
+@dataclass
+class HandLandmarks:
+    # (hands, 21, 3) normalized x, y, z as returned by MediaPipe.
+    landmarks: np.ndarray
+    # (hands,) 0 = Left, 1 = Right, -1 = unknown.
+    handedness: np.ndarray
+    # (hands,) handedness classification score.
+    scores: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "HandLandmarks":
+        return cls(
+            np.zeros((0, NUM_LANDMARKS, 3), np.float32),
+            np.zeros(0, np.int8),
+            np.zeros(0, np.float32),
+        )
+
+    def __len__(self) -> int:
+        return int(self.landmarks.shape[0])
+
+
+def load_solutions():
+    if hasattr(mp, "solutions"):
+        return mp.solutions
+    try:
+        from mediapipe import solutions as mp_solutions
+
+        return mp_solutions
+    except Exception:
+        try:
+            from mediapipe.python import solutions as mp_solutions
+
+            return mp_solutions
+        except Exception as exc:
+            raise RuntimeError(
+                "MediaPipe 'solutions' API not available. Ensure the official "
+                "'mediapipe' package is installed and no local mediapipe.py "
+                "shadows the dependency."
+            ) from exc
+
+
+def pack_result(result) -> HandLandmarks:
+    if not result.multi_hand_landmarks:
+        return HandLandmarks.empty()
+    count = len(result.multi_hand_landmarks)
+    landmarks = np.empty((count, NUM_LANDMARKS, 3), np.float32)
+    handedness = np.full(count, -1, np.int8)
+    scores = np.zeros(count, np.float32)
+    for idx, hand_landmarks in enumerate(result.multi_hand_landmarks):
+        landmarks[idx] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+    for idx, classification in enumerate(result.multi_handedness or []):
+        if idx >= count:
+            break
+        label = classification.classification[0]
+        if label.label in HANDEDNESS_LABELS:
+            handedness[idx] = HANDEDNESS_LABELS.index(label.label)
+        scores[idx] = label.score
+    return HandLandmarks(landmarks, handedness, scores)
+
+
+class InProcessBackend:
+    def __init__(self, settings: Dict[str, Any]) -> None:
+        self.hands = load_solutions().hands.Hands(**settings)
+
+    def infer(self, frame: np.ndarray) -> HandLandmarks:
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return pack_result(self.hands.process(image_rgb))
+
+    def close(self) -> None:
+        self.hands.close()
+
+
+def _worker_main(shm_name: str, slots: int, slot_bytes: int, settings: Dict[str, Any], conn) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = None
+    try:
+        ring = np.ndarray((slots, slot_bytes), np.uint8, buffer=shm.buf)
+        hands = load_solutions().hands.Hands(**settings)
+        conn.send(("ready", None))
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            seq, slot, height, width = msg
+            image = ring[slot, : height * width * 3].reshape(height, width, 3)
+            conn.send((seq, pack_result(hands.process(image))))
+        hands.close()
+    except Exception as exc:
+        conn.send(("error", repr(exc)))
+    finally:
+        del ring
+        shm.close()
+
+
+class ProcessBackend:
+    """Runs MediaPipe Hands in a worker process fed through shared memory.
+
+    Frames are colour-converted straight into a slot of a shared-memory ring,
+    so only the slot index and shape cross the pipe; results come back as
+    compact landmark arrays. Each tracker owns one worker, so several trackers
+    (one per camera) spread over as many cores without sharing the GIL.
+    """
+
+    def __init__(
+        self,
+        settings: Dict[str, Any],
+        slots: int = 2,
+        max_frame_size: Tuple[int, int] = (1920, 1080),
+        timeout: float = 2.0,
+    ) -> None:
+        self.settings = settings
+        self.slots = max(1, slots)
+        self.timeout = timeout
+        self._seq = 0
+        self._slot = 0
+        self._process: Optional[mp_proc.Process] = None
+        self._conn = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._start(max_frame_size[0] * max_frame_size[1] * 3)
+
+    def _start(self, slot_bytes: int) -> None:
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * slot_bytes)
+        self._ring = np.ndarray((self.slots, slot_bytes), np.uint8, buffer=self._shm.buf)
+        ctx = mp_proc.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(self._shm.name, self.slots, slot_bytes, self.settings, child_conn),
+            name="drumvision-inference",
+            daemon=True,
+        )
+        try:
+            try:
+                self._process.start()
+            finally:
+                child_conn.close()
+            # Startup includes loading the model, so allow much more than a frame.
+            if not self._conn.poll(max(self.timeout, 30.0)):
+                raise RuntimeError("Inference worker did not start")
+            status, detail = self._conn.recv()
+        except (EOFError, OSError) as exc:
+            # Spawning failed or the worker died before its handshake.
+            self._stop()
+            raise RuntimeError(f"Inference worker exited during startup: {exc!r}") from exc
+        except Exception:
+            self._stop()
+            raise
+        if status != "ready":
+            self._stop()
+            raise RuntimeError(f"Inference worker failed to start: {detail}")
+        logging.info("Inference worker started (pid=%s, %d slots)", self._process.pid, self.slots)
+
+    def _stop(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if self._process is not None:
+            # pid is None when the spawn itself failed.
+            if self._process.pid is not None:
+                self._process.join(timeout=1.0)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._shm is not None:
+            self._ring = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def infer(self, frame: np.ndarray) -> HandLandmarks:
+        height, width = frame.shape[:2]
+        needed = height * width * 3
+        if needed > self.slot_bytes:
+            logging.info("Growing inference ring for %dx%d frames", width, height)
+            self._stop()
+            self._start(needed)
+        slot = self._slot
+        self._slot = (self._slot + 1) % self.slots
+        target = self._ring[slot, :needed].reshape(height, width, 3)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=target)
+        self._seq += 1
+        self._conn.send((self._seq, slot, height, width))
+        while self._conn.poll(self.timeout):
+            seq, payload = self._conn.recv()
+            if seq == "error":
+                raise RuntimeError(f"Inference worker failed: {payload}")
+            if seq == self._seq:
+                return payload
+        logging.warning("Inference worker timed out")
+        return HandLandmarks.empty()
+
+    def close(self) -> None:
+        self._stop()
+
+
+class NullBackend:
+    """For trackers fed cached landmarks through HandTracker.track only."""
+
+    def infer(self, frame: np.ndarray) -> HandLandmarks:
+        raise RuntimeError("Inference is disabled for this tracker")
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(name: str, settings: Dict[str, Any]):
+    if name == "process":
+        return ProcessBackend(settings)
+    if name == "none":
+        return NullBackend()
+    if name != "inprocess":
+        logging.warning("Unknown inference backend %s, using inprocess", name)
+    return InProcessBackend(settings)
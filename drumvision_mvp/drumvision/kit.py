@@ -3,8 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 from .config import AppConfig
 
+INDEX_CELL_SIZE = 32
+
 
 @dataclass
 class KitPiece:
@@ -18,11 +22,98 @@ class KitPiece:
     threshold_speed: float
     last_hit_ts: float = 0.0
     roi: Optional[Tuple[int, int, int, int]] = None
+    priority: int = 0
+    rearm_ratio: float = 0.5
+    strike_points: Optional[List[str]] = None
+
+
+class KitIndex:
+    """Uniform-grid lookup from a pixel to the pads that may contain it.
+
+    Each cell stores a boolean row over the kit's pieces (in list_pieces()
+    order), so a batch of points is mapped to candidate pads with one gather
+    and only those pairs get the exact circle/ROI test. Where pads overlap,
+    only the highest-priority pads containing a point count; equal priorities
+    all count, as before.
+    """
+
+    def __init__(self, pieces: List[KitPiece], mode: str, cell_size: int = INDEX_CELL_SIZE) -> None:
+        self.pieces = pieces
+        self.cell_size = cell_size
+        count = len(pieces)
+        self.centers = np.array([piece.position for piece in pieces], float).reshape(-1, 2)
+        self.radius_sq = np.array([piece.radius for piece in pieces], float) ** 2
+        self.use_roi = np.array([mode == "object" and bool(piece.roi) for piece in pieces], bool)
+        self.rois = np.array([piece.roi or (0, 0, 0, 0) for piece in pieces], float).reshape(-1, 4)
+        self.priority = np.array([piece.priority for piece in pieces], float)
+        self.has_overlap_priority = count > 0 and self.priority.min() != self.priority.max()
+
+        boxes = np.empty((count, 4))
+        boxes[:, :2] = self.centers - np.sqrt(self.radius_sq)[:, None]
+        boxes[:, 2:] = self.centers + np.sqrt(self.radius_sq)[:, None]
+        boxes[self.use_roi] = self.rois[self.use_roi]
+        if count:
+            self.origin = np.floor(boxes[:, :2].min(axis=0))
+            extent = boxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+        self.shape = (int(extent[1] // cell_size) + 1, int(extent[0] // cell_size) + 1)
+        cells = np.zeros(self.shape + (count,), bool)
+        spans = np.floor((boxes - np.tile(self.origin, 2)) / cell_size).astype(int)
+        for col, (x1, y1, x2, y2) in enumerate(spans):
+            cells[max(y1, 0) : y2 + 1, max(x1, 0) : x2 + 1, col] = True
+        self.cells = cells.reshape(-1, count)
+
+    def candidates(self, points: np.ndarray) -> np.ndarray:
+        cell = np.floor((points - self.origin) / self.cell_size).astype(int)
+        valid = (cell[:, 0] >= 0) & (cell[:, 0] < self.shape[1]) & (cell[:, 1] >= 0) & (cell[:, 1] < self.shape[0])
+        mask = np.zeros((len(points), len(self.pieces)), bool)
+        mask[valid] = self.cells[cell[valid, 1] * self.shape[1] + cell[valid, 0]]
+        return mask
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        points = np.asarray(points, float).reshape(-1, 2)
+        rows, cols = np.nonzero(self.candidates(points))
+        pts = points[rows]
+        delta = pts - self.centers[cols]
+        hit = (delta**2).sum(axis=1) <= self.radius_sq[cols]
+        roi_pairs = self.use_roi[cols]
+        if roi_pairs.any():
+            r = self.rois[cols]
+            in_roi = (r[:, 0] <= pts[:, 0]) & (pts[:, 0] <= r[:, 2]) & (r[:, 1] <= pts[:, 1]) & (pts[:, 1] <= r[:, 3])
+            hit = np.where(roi_pairs, in_roi, hit)
+        inside = np.zeros((len(points), len(self.pieces)), bool)
+        inside[rows[hit], cols[hit]] = True
+        if self.has_overlap_priority:
+            ranked = np.where(inside, self.priority[None, :], -np.inf)
+            inside &= ranked == ranked.max(axis=1, keepdims=True)
+        return inside
 
 
 @dataclass
 class DrumKit:
     pieces: Dict[str, KitPiece] = field(default_factory=dict)
+    parent: Optional["DrumKit"] = field(default=None, repr=False)
+    _revision: int = field(default=0, repr=False)
+    _index: Dict[str, Tuple[int, KitIndex]] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def revision(self) -> int:
+        """Bumped by touch() whenever piece geometry or thresholds change."""
+        if self.parent is not None:
+            return self.parent.revision
+        return self._revision
+
+    def touch(self) -> None:
+        if self.parent is not None:
+            self.parent.touch()
+        else:
+            self._revision += 1
+
+    def subset(self, names: List[str]) -> "DrumKit":
+        # Shares the KitPiece objects and the revision counter with this kit.
+        return DrumKit(pieces={name: self.pieces[name] for name in names if name in self.pieces}, parent=self)
 
     @classmethod
     def from_config(cls, config: AppConfig) -> "DrumKit":
@@ -41,8 +132,40 @@ class DrumKit:
                 velocity_max=piece_cfg.velocity_max,
                 threshold_speed=piece_cfg.threshold_speed,
                 roi=roi,
+                priority=piece_cfg.priority,
+                rearm_ratio=piece_cfg.rearm_ratio,
+                strike_points=piece_cfg.strike_points,
             )
         return cls(pieces=pieces)
 
     def list_pieces(self) -> List[KitPiece]:
         return list(self.pieces.values())
+
+    def index(self, mode: str) -> KitIndex:
+        cached = self._index.get(mode)
+        if cached is None or cached[0] != self.revision:
+            cached = (self.revision, KitIndex(self.list_pieces(), mode))
+            self._index[mode] = cached
+        return cached[1]
+
+    def regions(self) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int, int]]]:
+        """Pad circles (x, y, radius) and ROI rectangles, whatever the mode."""
+        circles = [(piece.position[0], piece.position[1], piece.radius) for piece in self.pieces.values()]
+        rects = [tuple(piece.roi) for piece in self.pieces.values() if piece.roi]
+        return circles, rects
+
+    def bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        boxes = []
+        for piece in self.pieces.values():
+            x, y = piece.position
+            boxes.append((x - piece.radius, y - piece.radius, x + piece.radius, y + piece.radius))
+            if piece.roi:
+                boxes.append(tuple(piece.roi))
+        if not boxes:
+            return None
+        return (
+            min(box[0] for box in boxes),
+            min(box[1] for box in boxes),
+            max(box[2] for box in boxes),
+            max(box[3] for box in boxes),
+        )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .inference import NUM_LANDMARKS, HandLandmarks
+from .replay import FRAMES_FILE, TIMESTAMPS_FILE
+from .utils import save_json
+
+CACHE_DIR = "landmarks"
+
+
+def cache_key(video_path: str, frames: int, settings: Dict[str, Any]) -> str:
+    # Re-recording a session changes size/mtime, and any change to the model
+    # settings changes what it would detect, so both belong in the key.
+    stat = os.stat(video_path)
+    identity = {
+        "video": os.path.basename(video_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "frames": frames,
+        "settings": settings,
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class LandmarkCache:
+    """Per-frame hand landmarks of a recording, in memory-mapped .npy files.
+
+    Rows are indexed by frame; ``counts`` holds the number of hands found, or
+    -1 for frames not inferred yet, so a cache can be filled incrementally and
+    survives an interrupted run.
+    """
+
+    def __init__(self, directory: str, frames: int, max_hands: int) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        shapes = {
+            "landmarks": ((frames, max_hands, NUM_LANDMARKS, 3), np.float32),
+            "handedness": ((frames, max_hands), np.int8),
+            "scores": ((frames, max_hands), np.float32),
+            "counts": ((frames,), np.int8),
+        }
+        arrays: Dict[str, np.ndarray] = {}
+        for name, (shape, dtype) in shapes.items():
+            path = os.path.join(directory, f"{name}.npy")
+            if os.path.exists(path):
+                arrays[name] = np.lib.format.open_memmap(path, mode="r+")
+            else:
+                arrays[name] = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+                if name == "counts":
+                    arrays[name][:] = -1
+        self.landmarks = arrays["landmarks"]
+        self.handedness = arrays["handedness"]
+        self.scores = arrays["scores"]
+        self.counts = arrays["counts"]
+        self.max_hands = max_hands
+
+    @staticmethod
+    def settings_for(tracker) -> Dict[str, Any]:
+        """What a tracker's inference depends on, as folded into the key."""
+        return dict(tracker.settings, inference_scale=tracker.inference_scale)
+
+    @classmethod
+    def for_session(cls, session_path: str, tracker) -> "LandmarkCache":
+        # Cached frames are always inferred on the full frame (no kit crop),
+        # so a cache stays valid however the kit is laid out.
+        video_path = os.path.join(session_path, FRAMES_FILE)
+        frames = len(np.load(os.path.join(session_path, TIMESTAMPS_FILE), mmap_mode="r"))
+        settings = cls.settings_for(tracker)
+        key = cache_key(video_path, frames, settings)
+        cache = cls(os.path.join(session_path, CACHE_DIR, key), frames, settings["max_num_hands"])
+        save_json(os.path.join(cache.directory, "settings.json"), settings)
+        logging.info("Landmark cache %s: %d/%d frames cached", key, cache.cached, frames)
+        return cache
+
+    @property
+    def cached(self) -> int:
+        return int(np.count_nonzero(self.counts >= 0))
+
+    @property
+    def complete(self) -> bool:
+        return bool((self.counts >= 0).all())
+
+    def get(self, index: int) -> Optional[HandLandmarks]:
+        count = int(self.counts[index])
+        if count < 0:
+            return None
+        return HandLandmarks(
+            np.array(self.landmarks[index, :count]),
+            np.array(self.handedness[index, :count]),
+            np.array(self.scores[index, :count]),
+        )
+
+    def put(self, index: int, detected: HandLandmarks) -> None:
+        count = min(len(detected), self.max_hands)
+        self.landmarks[index, :count] = detected.landmarks[:count]
+        self.handedness[index, :count] = detected.handedness[:count]
+        self.scores[index, :count] = detected.scores[:count]
+        self.counts[index] = count
+
+    def flush(self) -> None:
+        for array in (self.landmarks, self.handedness, self.scores, self.counts):
+            array.flush()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .filters import PointFilter
+from .governor import MotionCheck
+from .tracking import DEFAULT_HISTORY_SIZE, HandState, HandTracker
+
+MARKER_KINDS = ("color", "aruco")
+DEFAULT_HSV_MIN = (40, 80, 80)
+DEFAULT_HSV_MAX = (85, 255, 255)
+DEFAULT_ARUCO_DICTIONARY = "DICT_4X4_50"
+# Search window (px) around each marker's predicted position, grown by the
+# distance it is predicted to travel, so a fast stroke stays inside.
+SEARCH_RADIUS = 48
+# The whole kit area is searched at least this often (frames) while fewer
+# markers than expected are tracked, so a stick entering the view is found.
+FULL_SEARCH_INTERVAL = 10
+# Colour blobs smaller than this (px) are noise.
+MIN_BLOB_AREA = 12
+# Detections closer than this (px) come from overlapping windows.
+DUPLICATE_PX = 6.0
+
+
+@dataclass
+class MarkerDetections:
+    # (markers, 2) frame pixels.
+    points: np.ndarray
+    # (markers,) ArUco id, or -1 for colour blobs.
+    labels: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "MarkerDetections":
+        return cls(np.zeros((0, 2)), np.zeros(0, int))
+
+    def __len__(self) -> int:
+        return int(self.points.shape[0])
+
+
+class MarkerTracker(HandTracker):
+    """Tracks stick-tip markers (coloured tape or ArUco) instead of hands.
+
+    Each marker is one "hand" with a single ``stick_tip`` strike point, so
+    association, filtering, histories and the motion gate are the
+    HandTracker's own. Detection is plain OpenCV and, once markers are
+    found, restricted to small windows around where they are expected next;
+    the kit area is searched only while markers are missing.
+    """
+
+    def __init__(
+        self,
+        kind: str = "color",
+        hsv_min: Sequence[int] = DEFAULT_HSV_MIN,
+        hsv_max: Sequence[int] = DEFAULT_HSV_MAX,
+        aruco_dictionary: str = DEFAULT_ARUCO_DICTIONARY,
+        max_markers: int = 2,
+        crop_to_kit: bool = False,
+        crop_margin: int = 40,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        point_filter: Optional[PointFilter] = None,
+        motion: Optional[MotionCheck] = None,
+    ) -> None:
+        super().__init__(
+            "none",
+            crop_to_kit,
+            crop_margin=crop_margin,
+            history_size=history_size,
+            point_filter=point_filter,
+            points=("stick_tip",),
+            motion=motion,
+        )
+        if kind not in MARKER_KINDS:
+            logging.warning("Unknown marker kind %s, using color", kind)
+            kind = "color"
+        self.kind = kind
+        self.max_markers = max_markers
+        self.settings["max_num_hands"] = max_markers
+        self.hsv_min = np.array(hsv_min, np.uint8)
+        self.hsv_max = np.array(hsv_max, np.uint8)
+        self._aruco = None
+        if kind == "aruco":
+            if not hasattr(cv2.aruco, aruco_dictionary):
+                logging.warning("Unknown ArUco dictionary %s, using %s", aruco_dictionary, DEFAULT_ARUCO_DICTIONARY)
+                aruco_dictionary = DEFAULT_ARUCO_DICTIONARY
+            dictionary = cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, aruco_dictionary))
+            params = cv2.aruco.DetectorParameters()
+            # ArUco3's candidate search is roughly ten times faster on the
+            # small windows searched here.
+            params.useAruco3Detection = True
+            self._aruco = cv2.aruco.ArucoDetector(dictionary, params)
+        # (x, y, radius) per expected marker, planned by track().
+        self._windows: List[Tuple[float, float, float]] = []
+        self._since_full = FULL_SEARCH_INTERVAL
+        self._last_t: Optional[float] = None
+        logging.info("Marker tracker initialized (%s, up to %d markers)", kind, max_markers)
+
+    def _detect(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Marker centres in ``image`` pixels, and their labels."""
+        if self._aruco is not None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            corners, ids, _ = self._aruco.detectMarkers(gray)
+            if ids is None:
+                return np.zeros((0, 2)), np.zeros(0, int)
+            return np.array([c.reshape(-1, 2).mean(axis=0) for c in corners]), ids.ravel().astype(int)
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        if self.hsv_min[0] <= self.hsv_max[0]:
+            mask = cv2.inRange(hsv, self.hsv_min, self.hsv_max)
+        else:
+            # Hue range wrapping past 180 (reds).
+            low = self.hsv_min.copy()
+            low[0] = 0
+            high = self.hsv_max.copy()
+            high[0] = 180
+            mask = cv2.inRange(hsv, low, self.hsv_max) | cv2.inRange(hsv, self.hsv_min, high)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask)
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        blobs = np.flatnonzero(areas >= MIN_BLOB_AREA)
+        blobs = blobs[np.argsort(areas[blobs])[::-1][: self.max_markers]]
+        return centroids[1:][blobs], np.full(len(blobs), -1, int)
+
+    def _search(self, frame: np.ndarray, box: Tuple[int, int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        x1, y1, x2, y2 = box
+        if x2 <= x1 or y2 <= y1:
+            return np.zeros((0, 2)), np.zeros(0, int)
+        points, labels = self._detect(frame[y1:y2, x1:x2])
+        return points + (x1, y1), labels
+
+    def infer(self, frame: np.ndarray, crop: bool = True) -> MarkerDetections:
+        height, width = frame.shape[:2]
+        found: List[np.ndarray] = []
+        found_labels: List[np.ndarray] = []
+        for x, y, radius in self._windows:
+            box = (
+                max(0, int(x - radius)),
+                max(0, int(y - radius)),
+                min(width, int(x + radius) + 1),
+                min(height, int(y + radius) + 1),
+            )
+            points, labels = self._search(frame, box)
+            found.append(points)
+            found_labels.append(labels)
+        points = np.concatenate(found) if found else np.zeros((0, 2))
+        labels = np.concatenate(found_labels) if found_labels else np.zeros(0, int)
+        if len(points) > 1:
+            # Overlapping windows report the same marker twice.
+            keep = [
+                idx
+                for idx in range(len(points))
+                if not np.any(np.hypot(*(points[:idx] - points[idx]).T) < DUPLICATE_PX)
+            ]
+            points, labels = points[keep], labels[keep]
+        self._since_full += 1
+        missing = len(points) < self.max_markers and self._since_full >= FULL_SEARCH_INTERVAL
+        if not len(points) or missing:
+            box = self._crop_box(width, height) if crop else (0, 0, width, height)
+            self.last_crop = box
+            points, labels = self._search(frame, box)
+            self._since_full = 0
+        if len(points) > self.max_markers:
+            points, labels = points[: self.max_markers], labels[: self.max_markers]
+        # Keeps a kit crop wide enough to include every marker.
+        r = SEARCH_RADIUS
+        self._hand_boxes = [(x - r, y - r, x + r, y + r) for x, y in points.tolist()]
+        return MarkerDetections(points, labels)
+
+    def track(
+        self, detected: MarkerDetections, frame_shape: Tuple[int, int], timestamp: Optional[float] = None
+    ) -> List[HandState]:
+        now = timestamp if timestamp is not None else time.monotonic()
+        states = self._track_points(detected.points[:, None, :], detected.labels, now)
+        # Next frame's windows: one frame interval ahead along each velocity.
+        dt = now - self._last_t if self._last_t is not None else 0.0
+        self._last_t = now
+        self._windows = []
+        for state in states:
+            (x, y), (vx, vy) = state.position, state.velocity
+            step = min(dt, 0.1)
+            self._windows.append((x + vx * step, y + vy * step, SEARCH_RADIUS + np.hypot(vx, vy) * step))
+        return states
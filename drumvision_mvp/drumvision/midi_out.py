@@ -1,23 +1,56 @@
 from __future__ import annotations
 
+import heapq
 import logging
-import queue
 import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
 
 import mido
 
+from .hit_detection import CANCELLABLE_HITS
+
+NOTE_LENGTH = 0.05
+# Heap tie-break for events due at the same instant: release before strike so
+# a retrigger never has its new note cut by the previous note-off.
+NOTE_OFF_FIRST = 0
+NOTE_ON_SECOND = 1
+
 
 class MidiOut:
-    def __init__(self, enabled: bool = True) -> None:
+    """MIDI output driven by a single scheduler thread.
+
+    Note-ons and note-offs are kept in a heap ordered by due time and sent by
+    one thread that sleeps on a condition variable until the next event is due
+    (or a new one arrives), so callers never block on the port and a late event
+    cannot hold up earlier ones. Each note-on/note-off pair shares a sequence
+    id, which is how retriggers and cancellations find their partner.
+    """
+
+    def __init__(self, enabled: bool = True, latency_ms: float = 0.0) -> None:
         self.enabled = enabled
+        # Fixed capture-to-note delay. Hits are timestamped at their estimated
+        # impact, so scheduling each one at impact + latency turns variable
+        # processing delay into a constant offset the player can adapt to.
+        self.latency = latency_ms / 1000.0
         self.port: Optional[mido.ports.BaseOutput] = None
-        self._queue: "queue.Queue[tuple[float, int, int]]" = queue.Queue()
-        self._thread = threading.Thread(target=self._worker, daemon=True)
-        self._thread.start()
+        self._heap: List[Tuple[float, int, int, str, int, int]] = []
+        self._cond = threading.Condition()
+        self._seq = 0
+        # Note-ons still waiting in the heap, per note, and retracted pairs.
+        self._unsent: Dict[int, List[int]] = {}
+        self._cancelled: Set[int] = set()
+        # Sequence id of the note-on currently sounding, per note.
+        self._held: Dict[int, int] = {}
+        # Hit id -> (note, sequence id), for cancelling one specific hit.
+        self._hits: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+        self.late_events = 0
+        self._running = True
         if enabled:
             self._open_port()
+        self._thread = threading.Thread(target=self._worker, name="drumvision-midi", daemon=True)
+        self._thread.start()
 
     def _open_port(self) -> None:
         try:
@@ -38,26 +71,105 @@ class MidiOut:
             logging.error("Failed to open MIDI output: %s", exc)
             self.enabled = False
 
-    def send_hit(self, midi_note: int, velocity: int) -> None:
+    def _push(self, due: float, order: int, seq: int, kind: str, note: int, velocity: int) -> None:
+        heapq.heappush(self._heap, (due, order, seq, kind, note, velocity))
+
+    def send_hit(
+        self, midi_note: int, velocity: int, timestamp: Optional[float] = None, hit_id: Optional[int] = None
+    ) -> None:
         if not self.enabled or not self.port:
             return
-        now = time.time()
-        self.port.send(mido.Message("note_on", note=midi_note, velocity=velocity))
-        self._queue.put((now + 0.05, midi_note, 0))
+        now = time.monotonic()
+        due = now if timestamp is None else max(now, timestamp + self.latency)
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            self._unsent.setdefault(midi_note, []).append(seq)
+            if hit_id is not None:
+                self._hits[hit_id] = (midi_note, seq)
+                if len(self._hits) > CANCELLABLE_HITS:
+                    self._hits.popitem(last=False)
+            self._push(due, NOTE_ON_SECOND, seq, "note_on", midi_note, velocity)
+            self._push(due + NOTE_LENGTH, NOTE_OFF_FIRST, seq, "note_off", midi_note, 0)
+            self._cond.notify()
+
+    def cancel_hit(self, hit_id: int) -> None:
+        """Retracts one hit sent with ``hit_id``; other notes are untouched."""
+        if not self.enabled or not self.port:
+            return
+        with self._cond:
+            entry = self._hits.pop(hit_id, None)
+            if entry is None:
+                return
+            midi_note, seq = entry
+            pending = self._unsent.get(midi_note)
+            if pending and seq in pending:
+                # Still scheduled: drop the pair so the note never sounds.
+                pending.remove(seq)
+                self._cancelled.add(seq)
+                return
+            if self._held.get(midi_note) == seq:
+                self._push(time.monotonic(), NOTE_OFF_FIRST, seq, "note_off", midi_note, 0)
+                self._cond.notify()
+
+    def _next_message(self) -> Optional[List[mido.Message]]:
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0][0] - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                due, _, seq, kind, note, velocity = heapq.heappop(self._heap)
+                if -wait > 0.005:
+                    self.late_events += 1
+                if kind == "note_on":
+                    unsent = self._unsent.get(note)
+                    if unsent and seq in unsent:
+                        unsent.remove(seq)
+                    if seq in self._cancelled:
+                        continue
+                    messages = []
+                    if note in self._held:
+                        # Retrigger of a sounding note: release it first and
+                        # let its own (now stale) note-off be skipped later.
+                        messages.append(mido.Message("note_off", note=note, velocity=0))
+                    self._held[note] = seq
+                    messages.append(mido.Message("note_on", note=note, velocity=velocity))
+                    return messages
+                if seq in self._cancelled:
+                    self._cancelled.discard(seq)
+                    continue
+                if self._held.get(note) != seq:
+                    continue
+                del self._held[note]
+                return [mido.Message("note_off", note=note, velocity=velocity)]
+        return None
 
     def _worker(self) -> None:
         while True:
-            try:
-                due, note, velocity = self._queue.get(timeout=0.05)
-            except queue.Empty:
+            messages = self._next_message()
+            if messages is None:
+                return
+            if not self.port:
                 continue
-            delay = max(0.0, due - time.time())
-            if delay:
-                time.sleep(delay)
-            if self.port:
-                self.port.send(mido.Message("note_off", note=note, velocity=velocity))
+            for message in messages:
+                try:
+                    self.port.send(message)
+                except Exception as exc:  # pragma: no cover - system dependent
+                    logging.warning("MIDI send failed: %s", exc)
 
     def close(self) -> None:
+        with self._cond:
+            self._running = False
+            held = list(self._held)
+            self._held.clear()
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
         if self.port:
+            for note in held:
+                self.port.send(mido.Message("note_off", note=note, velocity=0))
             self.port.close()
             logging.info("MIDI port closed")
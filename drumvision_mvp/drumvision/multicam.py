@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .camera import CameraManager, CapturedFrame
+from .hit_detection import CANCELLABLE_HITS, HitDetector, HitEvent
+from .kit import DrumKit
+from .profiling import FrameTrace, Profiler
+from .tracking import HandState, HandTracker
+from .utils import FPSCounter
+
+
+class HitFusion:
+    """Merges per-camera hit candidates for the same piece into one event.
+
+    The first candidate for a piece is released at once, so fusion adds no
+    latency; any other candidate for that piece within ``window_ms`` of it is
+    a duplicate from another camera and is folded in instead of played. A
+    cancel of a folded candidate just drops it. A cancel of the released
+    event is passed on, and the fastest folded candidate still standing (a
+    real hit another camera saw) is released in its place.
+    """
+
+    def __init__(self, window_ms: float = 30.0) -> None:
+        self.window = window_ms / 1000.0
+        self.merged = 0
+        # Piece -> (released event, folded candidates) of its latest hit.
+        self._latest: Dict[str, Tuple[HitEvent, List[HitEvent]]] = {}
+        self._ready: List[HitEvent] = []
+        # Ids of recently released hits, oldest first, for late cancels.
+        self._released: Deque[int] = deque(maxlen=CANCELLABLE_HITS)
+        self._cond = threading.Condition()
+
+    def _release(self, event: HitEvent, folded: List[HitEvent]) -> None:
+        self._latest[event.piece_name] = (event, folded)
+        self._released.append(event.hit_id)
+        self._ready.append(event)
+
+    def _cancel(self, event: HitEvent) -> None:
+        latest = self._latest.get(event.piece_name)
+        if latest is not None:
+            released, folded = latest
+            kept = [c for c in folded if c.hit_id != event.hit_id]
+            if len(kept) != len(folded):
+                # A duplicate retracted before it was ever played.
+                folded[:] = kept
+                return
+            if released.hit_id == event.hit_id:
+                self._ready.append(event)
+                del self._latest[event.piece_name]
+                if folded:
+                    # Confidence is always 1.0, so the candidates rank on
+                    # velocity alone.
+                    best = max(folded, key=lambda c: c.velocity)
+                    self._release(best, [c for c in folded if c is not best])
+                return
+        if event.hit_id in self._released:
+            self._ready.append(event)
+
+    def add(self, events: List[HitEvent]) -> None:
+        if not events:
+            return
+        with self._cond:
+            for event in events:
+                if event.cancelled:
+                    self._cancel(event)
+                    continue
+                latest = self._latest.get(event.piece_name)
+                if latest and abs(event.timestamp - latest[0].timestamp) <= self.window:
+                    self.merged += 1
+                    latest[1].append(event)
+                    continue
+                self._release(event, [])
+            self._cond.notify_all()
+
+    def wait_ready(self, timeout: float = 0.1) -> List[HitEvent]:
+        with self._cond:
+            if not self._ready:
+                self._cond.wait(timeout)
+            ready, self._ready = self._ready, []
+        ready.sort(key=lambda e: e.timestamp)
+        return ready
+
+    def wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+
+@dataclass
+class CameraSource:
+    camera: CameraManager
+    tracker: HandTracker
+    detector: HitDetector = field(default_factory=HitDetector)
+    kit: DrumKit = field(default_factory=DrumKit)
+    fps_counter: FPSCounter = field(default_factory=FPSCounter)
+    fps: float = 0.0
+    latest: Optional[Tuple[CapturedFrame, List[HandState]]] = None
+
+
+class MultiCameraManager:
+    def __init__(
+        self,
+        camera_ids: List[int],
+        tracker_factory: Callable[[], HandTracker],
+        fusion_window_ms: float = 30.0,
+        detector_factory: Callable[[], HitDetector] = HitDetector,
+    ) -> None:
+        self.sources: Dict[int, CameraSource] = {}
+        self.primary_id = camera_ids[0]
+        self.fusion = HitFusion(fusion_window_ms)
+        self.mode = "air"
+        self.focus_enabled = True
+        self.profiler: Optional[Profiler] = None
+        self._running = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        try:
+            for camera_id in camera_ids:
+                camera = CameraManager(camera_id, background_grab=True)
+                self.sources[camera_id] = CameraSource(
+                    camera=camera, tracker=tracker_factory(), detector=detector_factory()
+                )
+        except Exception:
+            self.release()
+            raise
+        logging.info("Multi-camera manager opened cameras %s", camera_ids)
+
+    def set_kit(self, kit: DrumKit, piece_cameras: Dict[str, List[int]]) -> None:
+        # Views share the KitPiece objects, so calibration edits apply everywhere.
+        routed: Dict[int, List[str]] = {camera_id: [] for camera_id in self.sources}
+        for name in kit.pieces:
+            targets = [cid for cid in piece_cameras.get(name, [self.primary_id]) if cid in routed]
+            if not targets:
+                logging.warning("Piece %s routed to no open camera, using camera %s", name, self.primary_id)
+                targets = [self.primary_id]
+            for camera_id in targets:
+                routed[camera_id].append(name)
+        for camera_id, source in self.sources.items():
+            source.kit = kit.subset(routed[camera_id])
+            logging.info("Camera %s watches %s", camera_id, sorted(source.kit.pieces))
+        self.set_focus(self.focus_enabled)
+
+    def set_focus(self, enabled: bool) -> None:
+        self.focus_enabled = enabled
+        for source in self.sources.values():
+            if enabled:
+                source.tracker.set_focus(source.kit.bounds(), source.kit.regions())
+            else:
+                source.tracker.set_focus(None)
+
+    def start(self) -> None:
+        self._running.set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.sources), thread_name_prefix="drumvision-cam"
+        )
+        for camera_id, source in self.sources.items():
+            self._executor.submit(self._worker, camera_id, source)
+
+    def stop(self) -> None:
+        self._running.clear()
+        self.fusion.wake()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _worker(self, camera_id: int, source: CameraSource) -> None:
+        while self._running.is_set():
+            captured = source.camera.read_frame(timeout=0.1)
+            if captured is None:
+                continue
+            trace = FrameTrace(captured.timestamp)
+            try:
+                trace.infer_start = time.monotonic()
+                hands = source.tracker.process(captured.image, captured.timestamp)
+                trace.infer_end = time.monotonic()
+                events = source.detector.process(
+                    hands, source.kit, self.mode, captured.timestamp, captured.image
+                )
+                trace.detect_end = time.monotonic()
+            except Exception:
+                logging.exception("Camera %s processing failed", camera_id)
+                continue
+            if self.profiler is not None:
+                self.profiler.frame(trace)
+            self.fusion.add(events)
+            source.latest = (captured, hands)
+            source.fps = source.fps_counter.tick()
+
+    def wait_hits(self, timeout: float = 0.1) -> List[HitEvent]:
+        return self.fusion.wait_ready(timeout)
+
+    def latest(self, camera_id: Optional[int] = None) -> Optional[Tuple[CapturedFrame, List[HandState]]]:
+        source = self.sources.get(self.primary_id if camera_id is None else camera_id)
+        return source.latest if source else None
+
+    def summary(self) -> str:
+        parts = [
+            f"cam{cid} {source.fps:.1f}fps drop={source.camera.frames_dropped}"
+            for cid, source in self.sources.items()
+        ]
+        parts.append(f"merged={self.fusion.merged}")
+        return " | ".join(parts)
+
+    def release(self) -> None:
+        self.stop()
+        for source in self.sources.values():
+            source.camera.release()
+            source.tracker.close()
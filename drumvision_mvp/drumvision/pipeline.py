@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .hit_detection import HitEvent
+from .profiling import FrameTrace
+from .tracking import HandState
+
+
+@dataclass
+class FramePacket:
+    frame_id: int
+    frame: np.ndarray
+    capture_ts: float
+    trace: Optional[FrameTrace] = None
+    hands: List[HandState] = field(default_factory=list)
+    events: List[HitEvent] = field(default_factory=list)
+
+
+class LatestQueue:
+    """Bounded queue where a new item evicts the oldest one instead of blocking."""
+
+    def __init__(self, maxsize: int = 1) -> None:
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0
+        self._items: Deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+@dataclass
+class StageStats:
+    name: str
+    count: int = 0
+    last_ms: float = 0.0
+    avg_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if self.count == 1:
+            self.avg_ms = elapsed_ms
+        else:
+            self.avg_ms += 0.05 * (elapsed_ms - self.avg_ms)
+
+
+class Pipeline:
+    """Capture -> inference -> detection/output stages, each on its own thread.
+
+    Stages are joined by LatestQueues, so a slow consumer only ever sees the
+    newest packet and never stalls its producer. Rendering pulls from the last
+    queue on the caller's thread (OpenCV windows must stay on the main thread).
+    """
+
+    def __init__(
+        self,
+        read_frame: Callable[[], Tuple[bool, Optional[np.ndarray], float]],
+        infer: Callable[[FramePacket], None],
+        detect: Callable[[FramePacket], None],
+        queue_size: int = 1,
+    ) -> None:
+        self._read_frame = read_frame
+        self._infer = infer
+        self._detect = detect
+        self.queues: Dict[str, LatestQueue] = {
+            "inference": LatestQueue(queue_size),
+            "detection": LatestQueue(queue_size),
+            "render": LatestQueue(queue_size),
+        }
+        self.stats: Dict[str, StageStats] = {
+            name: StageStats(name) for name in ("capture", "inference", "detection", "render")
+        }
+        self._running = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._frame_id = 0
+
+    def start(self) -> None:
+        self._running.set()
+        targets = {
+            "capture": self._capture_loop,
+            "inference": self._inference_loop,
+            "detection": self._detection_loop,
+        }
+        for name, target in targets.items():
+            thread = threading.Thread(target=target, name=f"drumvision-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info("Pipeline started with %d stage threads", len(self._threads))
+
+    def stop(self) -> None:
+        self._running.clear()
+        for q in self.queues.values():
+            q.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+        logging.info("Pipeline stopped")
+
+    def next_render(self, timeout: float = 0.05) -> Optional[FramePacket]:
+        return self.queues["render"].get(timeout)
+
+    def record_render(self, elapsed_ms: float) -> None:
+        self.stats["render"].record(elapsed_ms)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        report: Dict[str, Dict[str, float]] = {}
+        for name, stats in self.stats.items():
+            entry = {
+                "count": float(stats.count),
+                "last_ms": stats.last_ms,
+                "avg_ms": stats.avg_ms,
+                "max_ms": stats.max_ms,
+            }
+            queue = self.queues.get(name)
+            if queue is not None:
+                entry["queue_depth"] = float(queue.qsize())
+                entry["dropped"] = float(queue.dropped)
+            report[name] = entry
+        return report
+
+    def summary(self) -> str:
+        parts = []
+        for name, entry in self.report().items():
+            text = f"{name} {entry['avg_ms']:.1f}ms"
+            if "queue_depth" in entry:
+                text += f" q={int(entry['queue_depth'])} drop={int(entry['dropped'])}"
+            parts.append(text)
+        return " | ".join(parts)
+
+    def _capture_loop(self) -> None:
+        while self._running.is_set():
+            start = time.perf_counter()
+            ret, frame, capture_ts = self._read_frame()
+            if not ret or frame is None:
+                time.sleep(0.001)
+                continue
+            self._frame_id += 1
+            self.queues["inference"].put(FramePacket(self._frame_id, frame, capture_ts, FrameTrace(capture_ts)))
+            self.stats["capture"].record((time.perf_counter() - start) * 1000)
+
+    def _run_stage(self, name: str, handler: Callable[[FramePacket], None], output: str) -> None:
+        source = self.queues[name]
+        while self._running.is_set():
+            packet = source.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                handler(packet)
+            except Exception:
+                logging.exception("Pipeline stage %s failed", name)
+                continue
+            self.stats[name].record((time.perf_counter() - start) * 1000)
+            self.queues[output].put(packet)
+
+    def _inference_loop(self) -> None:
+        self._run_stage("inference", self._infer, "detection")
+
+    def _detection_loop(self) -> None:
+        self._run_stage("detection", self._detect, "render")
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .utils import LOG_PATH, save_json
+
+LATENCY_PATH = os.path.join(os.path.dirname(LOG_PATH), "latency.json")
+
+# Log-spaced buckets from 0.01 ms to ~10 s, ~5% apart.
+BUCKET_MIN_MS = 0.01
+BUCKET_RATIO = 1.05
+BUCKET_COUNT = 284
+# Histograms cover the current plus the previous window, so percentiles stay
+# "recent" without dropping to zero samples right after a rotation.
+WINDOW_SECONDS = 10.0
+
+
+class LatencyHistogram:
+    """Fixed log-bucket histogram: O(1) record, percentiles without sorting."""
+
+    __slots__ = ("counts", "previous", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(BUCKET_COUNT, np.int64)
+        self.previous = np.zeros(BUCKET_COUNT, np.int64)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        if ms <= BUCKET_MIN_MS:
+            bucket = 0
+        else:
+            bucket = min(BUCKET_COUNT - 1, int(math.log(ms / BUCKET_MIN_MS) / math.log(BUCKET_RATIO)) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def rotate(self) -> None:
+        self.previous, self.counts = self.counts, self.previous
+        self.counts.fill(0)
+
+    def percentiles(self, quantiles: List[float]) -> List[float]:
+        merged = self.counts + self.previous
+        total = int(merged.sum())
+        if total == 0:
+            return [0.0 for _ in quantiles]
+        cumulative = np.cumsum(merged)
+        buckets = np.searchsorted(cumulative, [q * total for q in quantiles])
+        # Report the upper edge of the bucket, i.e. a conservative estimate.
+        return [BUCKET_MIN_MS * BUCKET_RATIO ** int(bucket) for bucket in buckets]
+
+    def snapshot(self) -> Dict[str, float]:
+        p50, p95, p99 = self.percentiles([0.5, 0.95, 0.99])
+        return {
+            "count": float(self.count),
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+        }
+
+
+class FrameTrace:
+    """Monotonic timestamps a frame collects on its way through the app."""
+
+    __slots__ = ("capture", "infer_start", "infer_end", "detect_end")
+
+    def __init__(self, capture: float) -> None:
+        self.capture = capture
+        self.infer_start = 0.0
+        self.infer_end = 0.0
+        self.detect_end = 0.0
+
+
+class Profiler:
+    def __init__(self, window: float = WINDOW_SECONDS) -> None:
+        self.window = window
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._rotated = time.monotonic()
+
+    def record(self, name: str, ms: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(ms)
+            now = time.monotonic()
+            if now - self._rotated >= self.window:
+                self._rotated = now
+                for item in self.histograms.values():
+                    item.rotate()
+
+    def frame(self, trace: FrameTrace, from_capture: bool = True) -> None:
+        """Records the trace's stages; ``from_capture`` False skips the spans
+        measured from the capture time, when that is not on the monotonic clock."""
+        if trace.infer_start and from_capture:
+            self.record("capture_to_inference", (trace.infer_start - trace.capture) * 1000)
+        if trace.infer_end:
+            self.record("inference", (trace.infer_end - trace.infer_start) * 1000)
+        if trace.detect_end:
+            self.record("detection", (trace.detect_end - trace.infer_end) * 1000)
+            if from_capture:
+                self.record("frame_total", (trace.detect_end - trace.capture) * 1000)
+
+    def hit(self, path: str, impact_ts: float, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.record(f"hit_{path}", (now - impact_ts) * 1000)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+
+    def lines(self) -> List[str]:
+        return [
+            f"{name}: p50 {stats['p50_ms']:.1f} p95 {stats['p95_ms']:.1f} p99 {stats['p99_ms']:.1f} ms"
+            for name, stats in self.report().items()
+        ]
+
+    def summary(self) -> str:
+        return " | ".join(
+            f"{name} p50={stats['p50_ms']:.1f} p95={stats['p95_ms']:.1f} p99={stats['p99_ms']:.1f}"
+            for name, stats in self.report().items()
+        )
+
+    def dump(self, path: str = LATENCY_PATH) -> None:
+        save_json(path, {"generated_at": time.time(), "stages": self.report()})
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .camera import CapturedFrame
+from .hit_detection import HitEvent
+from .utils import load_json, save_json
+
+# Session directory layout.
+FRAMES_FILE = "frames.avi"
+TIMESTAMPS_FILE = "timestamps.npy"
+META_FILE = "meta.json"
+# Hand-labelled ground truth, [{"t": seconds from first frame, "piece": name}].
+LABELS_FILE = "hits.json"
+# Hits the app detected while recording; a starting point for labelling.
+DETECTED_FILE = "hits_detected.json"
+
+
+class SessionRecorder:
+    """Writes captured frames and their timestamps to a session directory.
+
+    Frames go to an MJPG video (near-lossless and cheap to encode on the
+    capture thread); timestamps are stored relative to the first frame.
+    """
+
+    def __init__(self, path: str, fps: float = 30.0) -> None:
+        self.path = path
+        self.fps = fps
+        os.makedirs(path, exist_ok=True)
+        self._writer: Optional[cv2.VideoWriter] = None
+        self._timestamps: List[float] = []
+        self._hits: List[Dict[str, object]] = []
+        self._size = (0, 0)
+
+    def write(self, captured: CapturedFrame) -> None:
+        image = captured.image
+        if self._writer is None:
+            self._size = (image.shape[1], image.shape[0])
+            self._writer = cv2.VideoWriter(
+                os.path.join(self.path, FRAMES_FILE), cv2.VideoWriter_fourcc(*"MJPG"), self.fps, self._size
+            )
+            logging.info("Recording %dx%d frames to %s", self._size[0], self._size[1], self.path)
+        self._writer.write(image)
+        self._timestamps.append(captured.timestamp)
+
+    def add_hit(self, event: HitEvent) -> None:
+        if not self._timestamps or event.cancelled:
+            return
+        t = round(event.timestamp - self._timestamps[0], 4)
+        self._hits.append({"t": t, "piece": event.piece_name, "velocity": event.velocity})
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.release()
+        self._writer = None
+        stamps = np.asarray(self._timestamps, np.float64)
+        np.save(os.path.join(self.path, TIMESTAMPS_FILE), stamps - stamps[0])
+        save_json(
+            os.path.join(self.path, META_FILE),
+            {"frames": len(stamps), "width": self._size[0], "height": self._size[1], "recorded_at": time.time()},
+        )
+        save_json(os.path.join(self.path, DETECTED_FILE), {"hits": self._hits})
+        logging.info("Recorded %d frames, %d hits to %s", len(stamps), len(self._hits), self.path)
+
+
+class ReplayCamera:
+    """Drop-in for CameraManager that plays back a recorded session.
+
+    Recorded timestamps are rebased onto the monotonic clock at start. With
+    ``realtime`` frames are released at their original pace; otherwise they
+    are returned as fast as they are read. Without ``decode`` only timestamps
+    are replayed (``image`` is None), for runs fed from a landmark cache.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, decode: bool = True) -> None:
+        self.path = path
+        self.realtime = realtime
+        self.decode = decode
+        self.video_path = os.path.join(path, FRAMES_FILE)
+        self.capture = cv2.VideoCapture(self.video_path) if decode else None
+        if self.capture is not None and not self.capture.isOpened():
+            raise RuntimeError(f"Could not open recorded session {path}")
+        self.timestamps = np.load(os.path.join(path, TIMESTAMPS_FILE))
+        meta = load_json(os.path.join(path, META_FILE))
+        self.frame_shape = (int(meta["height"]), int(meta["width"]))
+        self.base = time.monotonic()
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.finished = False
+        logging.info(
+            "Replaying %d frames from %s (%s)", len(self.timestamps), path, "realtime" if realtime else "max speed"
+        )
+
+    def read_frame(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        if self.finished:
+            return None
+        index = self.frames_captured
+        if index >= len(self.timestamps):
+            ok, image = False, None
+        elif self.capture is None:
+            ok, image = True, None
+        else:
+            ok, image = self.capture.read()
+        if not ok:
+            self.finished = True
+            logging.info("Replay finished after %d frames", index)
+            return None
+        timestamp = self.base + float(self.timestamps[index])
+        if self.realtime:
+            delay = timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_captured += 1
+        return CapturedFrame(image, timestamp, self.frames_captured, float(self.timestamps[index]) * 1000.0)
+
+    def read(self):
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+
+
+def load_labels(path: str) -> Optional[List[Dict[str, object]]]:
+    labels_path = os.path.join(path, LABELS_FILE)
+    if not os.path.exists(labels_path):
+        return None
+    return list(load_json(labels_path)["hits"])
+
+
+@dataclass
+class HitScore:
+    true_positives: int = 0
+    false_positives: int = 0
+    false_negatives: int = 0
+    # Detected minus labelled time of each matched hit, in ms.
+    timing_errors_ms: Optional[np.ndarray] = None
+    # Labelled hits nothing matched, as {"t", "piece"}.
+    missed: List[Dict[str, object]] = field(default_factory=list)
+
+    @property
+    def precision(self) -> float:
+        found = self.true_positives + self.false_positives
+        return self.true_positives / found if found else 1.0
+
+    @property
+    def recall(self) -> float:
+        expected = self.true_positives + self.false_negatives
+        return self.true_positives / expected if expected else 1.0
+
+    @property
+    def f1(self) -> float:
+        total = self.precision + self.recall
+        return 2 * self.precision * self.recall / total if total else 0.0
+
+    def report(self) -> Dict[str, float]:
+        errors = self.timing_errors_ms if self.timing_errors_ms is not None else np.zeros(0)
+        abs_errors = np.abs(errors)
+        return {
+            "true_positives": float(self.true_positives),
+            "false_positives": float(self.false_positives),
+            "false_negatives": float(self.false_negatives),
+            "precision": self.precision,
+            "recall": self.recall,
+            "f1": self.f1,
+            "timing_bias_ms": float(errors.mean()) if len(errors) else 0.0,
+            "timing_mae_ms": float(abs_errors.mean()) if len(errors) else 0.0,
+            "timing_p95_ms": float(np.percentile(abs_errors, 95)) if len(errors) else 0.0,
+        }
+
+
+def score_hits(
+    detected: List[Dict[str, object]], labels: List[Dict[str, object]], tolerance_ms: float = 50.0
+) -> HitScore:
+    """Matches detected to labelled hits per piece, nearest in time first."""
+    tolerance = tolerance_ms / 1000.0
+    score = HitScore()
+    errors: List[float] = []
+    for piece in sorted({str(hit["piece"]) for hit in detected} | {str(hit["piece"]) for hit in labels}):
+        found = np.array(sorted(float(hit["t"]) for hit in detected if hit["piece"] == piece))
+        truth = np.array(sorted(float(hit["t"]) for hit in labels if hit["piece"] == piece))
+        if len(found) and len(truth):
+            gaps = np.abs(found[:, None] - truth[None, :])
+            pairs = sorted(zip(*np.nonzero(gaps <= tolerance)), key=lambda pair: gaps[pair])
+            used_found, used_truth = set(), set()
+            for i, j in pairs:
+                if i in used_found or j in used_truth:
+                    continue
+                used_found.add(i)
+                used_truth.add(j)
+                errors.append((found[i] - truth[j]) * 1000.0)
+            matched = len(used_found)
+        else:
+            used_truth = set()
+            matched = 0
+        score.missed.extend({"t": float(t), "piece": piece} for j, t in enumerate(truth) if j not in used_truth)
+        score.true_positives += matched
+        score.false_positives += len(found) - matched
+        score.false_negatives += len(truth) - matched
+    score.timing_errors_ms = np.asarray(errors)
+    return score
+
+
+def session_hits(events: List[HitEvent], base: float) -> List[Dict[str, object]]:
+    """Turns a replay's event stream into session-relative hits.
+
+    A cancelled prediction withdraws the latest predicted hit on its piece.
+    """
+    hits: List[Dict[str, object]] = []
+    predicted: Dict[str, int] = {}
+    for event in events:
+        if event.cancelled:
+            idx = predicted.pop(event.piece_name, None)
+            if idx is not None:
+                hits[idx] = {}
+            continue
+        if event.predicted:
+            predicted[event.piece_name] = len(hits)
+        hits.append({"t": event.timestamp - base, "piece": event.piece_name, "velocity": event.velocity})
+    return [hit for hit in hits if hit]
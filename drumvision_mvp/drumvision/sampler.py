@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except Exception:  # pragma: no cover - depends on PortAudio being installed
+    sd = None
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+# Length of the fade applied to choked or stolen voices, to avoid clicks.
+FADE_SAMPLES = 96
+# <piece>.wav, <piece>_v<layer>.wav, <piece>_v<layer>_rr<n>.wav, <piece>_rr<n>.wav
+SAMPLE_NAME = re.compile(r"^(?P<piece>.+?)(?:_v(?P<layer>\d+))?(?:_rr(?P<rr>\d+))?\.wav$")
+
+
+def decode_wav(path: str, rate: int = SAMPLE_RATE, channels: int = CHANNELS) -> np.ndarray:
+    with wave.open(path, "rb") as handle:
+        width = handle.getsampwidth()
+        src_channels = handle.getnchannels()
+        src_rate = handle.getframerate()
+        raw = handle.readframes(handle.getnframes())
+    if width == 1:
+        data = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        data = np.frombuffer(raw, "<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        packed = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+        ints = (packed[:, 0].astype(np.int32) | (packed[:, 1].astype(np.int32) << 8) | (packed[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        data = ints.astype(np.float32) / 8388608.0
+    elif width == 4:
+        data = np.frombuffer(raw, "<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+    data = data.reshape(-1, src_channels)
+    if src_rate != rate and len(data):
+        src_t = np.arange(len(data)) / src_rate
+        dst_t = np.arange(int(len(data) * rate / src_rate)) / rate
+        data = np.stack([np.interp(dst_t, src_t, data[:, c]) for c in range(src_channels)], axis=1)
+    if src_channels == 1:
+        data = np.repeat(data, channels, axis=1)
+    elif src_channels != channels:
+        data = data[:, :channels] if src_channels > channels else np.repeat(data[:, :1], channels, axis=1)
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+@dataclass
+class PieceSamples:
+    # Velocity layers, softest first; each holds its round-robin variants.
+    layers: List[List[np.ndarray]] = field(default_factory=list)
+    round_robin: int = 0
+
+    def pick(self, velocity: int) -> Optional[np.ndarray]:
+        if not self.layers:
+            return None
+        layer = self.layers[min(len(self.layers) - 1, velocity * len(self.layers) // 128)]
+        self.round_robin += 1
+        return layer[self.round_robin % len(layer)]
+
+
+@dataclass
+class Voice:
+    piece: str
+    data: np.ndarray
+    gain: float
+    choke_group: Optional[str]
+    pos: int = 0
+    fade: int = 0
+
+
+class Sampler:
+    """Callback-driven sampler mixing preloaded float buffers.
+
+    All samples are decoded once into float32 arrays at the output rate. Hits
+    only append a voice; the PortAudio callback sums active voices into a
+    preallocated block, fading out choked and stolen voices.
+    """
+
+    def __init__(
+        self,
+        sample_dir: str,
+        buffer_size: int = 128,
+        max_voices: int = 32,
+        choke_groups: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if sd is None:
+            raise RuntimeError("sounddevice is not available")
+        self.buffer_size = buffer_size
+        self.max_voices = max_voices
+        self.choke_groups = choke_groups or {}
+        self.pieces: Dict[str, PieceSamples] = {}
+        self.voices: List[Voice] = []
+        self.stolen = 0
+        self._lock = threading.Lock()
+        self._mix = np.zeros((buffer_size * 4, CHANNELS), np.float32)
+        self._fade = np.linspace(1.0, 0.0, FADE_SAMPLES, dtype=np.float32)[:, None]
+        self._load(sample_dir)
+        self.stream = sd.OutputStream(
+            samplerate=SAMPLE_RATE,
+            channels=CHANNELS,
+            dtype="float32",
+            blocksize=buffer_size,
+            latency="low",
+            callback=self._callback,
+        )
+        self.stream.start()
+        logging.info(
+            "Sampler started: %d pieces, block=%d, output latency %.1f ms",
+            len(self.pieces),
+            buffer_size,
+            self.output_latency_ms,
+        )
+
+    @property
+    def output_latency_ms(self) -> float:
+        return (float(self.stream.latency) + self.buffer_size / SAMPLE_RATE) * 1000.0
+
+    def _load(self, sample_dir: str) -> None:
+        if not os.path.isdir(sample_dir):
+            logging.warning("Samples directory missing: %s", sample_dir)
+            return
+        found: Dict[str, Dict[int, List[tuple]]] = {}
+        for filename in sorted(os.listdir(sample_dir)):
+            match = SAMPLE_NAME.match(filename)
+            if not match:
+                continue
+            layer = int(match.group("layer") or 0)
+            rr = int(match.group("rr") or 0)
+            try:
+                data = decode_wav(os.path.join(sample_dir, filename))
+            except Exception as exc:
+                logging.warning("Failed to load sample %s: %s", filename, exc)
+                continue
+            found.setdefault(match.group("piece"), {}).setdefault(layer, []).append((rr, data))
+        for piece, layers in found.items():
+            self.pieces[piece] = PieceSamples(
+                layers=[[data for _, data in sorted(layers[key], key=lambda item: item[0])] for key in sorted(layers)]
+            )
+            logging.info("Loaded %s: %d velocity layer(s)", piece, len(layers))
+
+    def play(self, piece: str, velocity: int) -> Optional[Voice]:
+        samples = self.pieces.get(piece)
+        data = samples.pick(velocity) if samples else None
+        if data is None:
+            return None
+        gain = max(0.05, min(1.0, velocity / 127))
+        group = self.choke_groups.get(piece)
+        with self._lock:
+            if group is not None:
+                for voice in self.voices:
+                    if voice.choke_group == group and not voice.fade:
+                        voice.fade = FADE_SAMPLES
+            active = [voice for voice in self.voices if not voice.fade]
+            if len(active) >= self.max_voices:
+                # Steal the voice with the least left to contribute.
+                victim = min(active, key=lambda v: v.gain * (1.0 - v.pos / len(v.data)))
+                victim.fade = FADE_SAMPLES
+                self.stolen += 1
+            voice = Voice(piece, data, gain, group)
+            self.voices.append(voice)
+        return voice
+
+    def stop(self, voice: Voice) -> None:
+        """Fades out one voice returned by play(), if still sounding."""
+        with self._lock:
+            if not voice.fade and any(v is voice for v in self.voices):
+                voice.fade = FADE_SAMPLES
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        if frames > len(self._mix):
+            self._mix = np.zeros((frames, CHANNELS), np.float32)
+        mix = self._mix[:frames]
+        mix.fill(0.0)
+        with self._lock:
+            keep: List[Voice] = []
+            for voice in self.voices:
+                n = min(frames, len(voice.data) - voice.pos)
+                if voice.fade:
+                    n = min(n, voice.fade)
+                    start = FADE_SAMPLES - voice.fade
+                    mix[:n] += voice.data[voice.pos : voice.pos + n] * (voice.gain * self._fade[start : start + n])
+                    voice.fade -= n
+                    voice.pos += n
+                    if voice.fade > 0 and voice.pos < len(voice.data):
+                        keep.append(voice)
+                    continue
+                mix[:n] += voice.data[voice.pos : voice.pos + n] * voice.gain
+                voice.pos += n
+                if voice.pos < len(voice.data):
+                    keep.append(voice)
+            self.voices = keep
+        np.clip(mix, -1.0, 1.0, out=outdata)
+
+    def close(self) -> None:
+        self.stream.stop()
+        self.stream.close()
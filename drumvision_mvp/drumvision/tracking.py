@@ -2,15 +2,28 @@ from __future__ import annotations
 
 import logging
 import time
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional, Tuple
 
 import cv2
-import mediapipe as mp
 import numpy as np
 
+from .filters import PointFilter
+from .governor import (
+    MAX_IDLE_FRAMES,
+    SURPRISE_PX,
+    VELOCITY_DECAY,
+    KitRegions,
+    LoadGovernor,
+    LoadLevel,
+    MotionCheck,
+    level_settings,
+)
+from .inference import NUM_LANDMARKS, HandLandmarks, create_backend
 
-@dataclass
+
+@dataclass(slots=True)
 class HandState:
     hand_id: int
     strike_point: Tuple[int, int]
@@ -18,116 +31,559 @@ class HandState:
     v_mag: float
     timestamp: float
     confidence: float
+    # Sub-pixel filter outputs (px, px/s, px/s^2); strike_point is the
+    # rounded position, for drawing.
+    position: Tuple[float, float] = (0.0, 0.0)
+    velocity: Tuple[float, float] = (0.0, 0.0)
+    acceleration: Tuple[float, float] = (0.0, 0.0)
+    history: Optional["HandHistory"] = field(default=None, repr=False, compare=False)
+    # Which strike point this state describes. A hand's own state is its
+    # first configured point; ``points`` holds one state per point.
+    point: str = "index_tip"
+    points: List["HandState"] = field(default_factory=list, repr=False, compare=False)
+
+
+# Points sampled along the fitted trajectory between two frames when looking
+# for a boundary crossing; 32 gives ~1 ms resolution at 30 fps.
+CROSSING_SAMPLES = 32
+DEFAULT_HISTORY_SIZE = 8
 
 
-@dataclass
 class HandHistory:
-    points: List[Tuple[float, Tuple[int, int], float]] = field(default_factory=list)
+    """Fixed-capacity ring of (timestamp, x, y, confidence) samples.
+
+    Every sample is written twice, at ``i`` and ``i + capacity``, so the most
+    recent ``n`` samples are always one contiguous, oldest-first view of the
+    backing array: adding and querying never allocate.
+    """
+
+    __slots__ = ("capacity", "_data", "_head", "_count")
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_SIZE) -> None:
+        self.capacity = max(2, capacity)
+        self._data = np.zeros((2 * self.capacity, 4))
+        self._head = 0
+        self._count = 0
 
-    def add(self, timestamp: float, point: Tuple[int, int], confidence: float) -> None:
-        self.points.append((timestamp, point, confidence))
-        if len(self.points) > 8:
-            self.points.pop(0)
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, timestamp: float, point: Tuple[float, float], confidence: float) -> None:
+        # Scalar stores only: no row views or temporary arrays.
+        data, head, mirror = self._data, self._head, self._head + self.capacity
+        data[head, 0] = data[mirror, 0] = timestamp
+        data[head, 1] = data[mirror, 1] = point[0]
+        data[head, 2] = data[mirror, 2] = point[1]
+        data[head, 3] = data[mirror, 3] = confidence
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def samples(self, n: Optional[int] = None) -> np.ndarray:
+        """Oldest-first view of the last ``n`` samples (all by default)."""
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        return self._data[end - n : end]
+
+    def snapshot(self) -> "HandHistory":
+        """A private copy of the ring, frozen at this frame.
+
+        States carry a snapshot rather than the live ring, so a detection
+        stage reading frame N on another thread never sees samples (or a
+        half-written row) that inference adds for frame N + 1.
+        """
+        copy = HandHistory.__new__(HandHistory)
+        copy.capacity = self.capacity
+        copy._data = self._data.copy()
+        copy._head = self._head
+        copy._count = self._count
+        return copy
 
     def velocity(self) -> Tuple[float, float]:
-        if len(self.points) < 2:
+        """Two-point velocity from the last two samples, read as scalars."""
+        if self._count < 2:
             return 0.0, 0.0
-        (t1, p1, _), (t2, p2, _) = self.points[-2], self.points[-1]
-        dt = max(t2 - t1, 1e-6)
-        dx = (p2[0] - p1[0]) / dt
-        dy = (p2[1] - p1[1]) / dt
-        v_mag = float(np.hypot(dx, dy))
-        return dy, v_mag
+        data = self._data
+        last = self._head + self.capacity - 1
+        dt = max(float(data[last, 0] - data[last - 1, 0]), 1e-6)
+        return float(data[last, 1] - data[last - 1, 1]) / dt, float(data[last, 2] - data[last - 1, 2]) / dt
+
+    def trajectory(self) -> Optional[Tuple[float, np.ndarray, np.ndarray]]:
+        """Fits x(t), y(t) over the history, with t relative to the last sample.
+
+        Quadratic when there are at least three samples (captures the
+        deceleration into a stroke), linear otherwise.
+        """
+        if self._count < 2:
+            return None
+        samples = self.samples()
+        t_last = float(samples[-1, 0])
+        t = samples[:, 0] - t_last
+        if np.ptp(t) <= 0:
+            return None
+        degree = 2 if self._count >= 3 else 1
+        coeffs = np.polyfit(t, samples[:, 1:3], degree)
+        return t_last, coeffs[:, 0], coeffs[:, 1]
+
+    def crossing(self, inside: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> Optional[Tuple[float, float]]:
+        """Estimates when the point entered a region between the last two samples.
+
+        ``inside`` maps arrays of x and y to a boolean mask. Returns the
+        crossing timestamp and the speed (px/s) on the fitted trajectory at that
+        instant, or None when the history is too short.
+        """
+        fit = self.trajectory()
+        if fit is None:
+            return None
+        t_last, cx, cy = fit
+        (t1, x1, y1, _), (_, x2, y2, _) = self.samples(2).tolist()
+        t_prev = t1 - t_last
+        t = np.linspace(t_prev, 0.0, CROSSING_SAMPLES)
+        mask = inside(np.polyval(cx, t), np.polyval(cy, t))
+        if mask[0] or not mask.any():
+            # The smoothed fit disagrees with the raw samples; fall back to a
+            # straight line between the last two points.
+            frac = (t - t_prev) / -t_prev
+            mask = inside(x1 + (x2 - x1) * frac, y1 + (y2 - y1) * frac)
+            if mask[0] or not mask.any():
+                t_cross = 0.0
+            else:
+                t_cross = float(t[np.argmax(mask)])
+        else:
+            t_cross = float(t[np.argmax(mask)])
+        speed = float(np.hypot(np.polyval(np.polyder(cx), t_cross), np.polyval(np.polyder(cy), t_cross)))
+        return t_last + t_cross, speed
+
+
+# MediaPipe hand landmark indices.
+WRIST = 0
+INDEX_FINGER_MCP = 5
+INDEX_FINGER_TIP = 8
+MIDDLE_FINGER_MCP = 9
+STRIKE_POINTS = ("index_tip", "wrist", "stick_tip")
+DEFAULT_STICK_LENGTH = 3.0
+# Association: a detection farther than this (px) from every track's
+# predicted position starts a new track; disagreeing handedness costs extra.
+MATCH_MAX_DISTANCE = 150.0
+HANDEDNESS_PENALTY = 100.0
+# The last step is extrapolated at most this many times its own duration. A
+# jump timed over a short frame interval would otherwise be carried across a
+# long one and land the prediction far past the gate.
+MAX_EXTRAPOLATION = 2.0
+# Tracks unseen for longer than this (s) are dropped with their history.
+TRACK_TTL = 0.25
+# Crop boxes snap to this grid so the crop does not wobble frame to frame,
+# which would disturb MediaPipe's landmark tracking.
+CROP_ALIGN = 16
+
+
+def strike_points(pixels: np.ndarray, names: Tuple[str, ...], stick_length: float) -> np.ndarray:
+    """(hands, 21, 2) landmark pixels -> (hands, len(names), 2) strike points.
+
+    The stick tip is extrapolated from the index knuckle along the
+    wrist-to-knuckle direction, ``stick_length`` palm lengths out; a rough
+    stand-in for a stick gripped between thumb and index finger.
+    """
+    out = np.empty((len(pixels), len(names), 2))
+    for col, name in enumerate(names):
+        if name == "index_tip":
+            out[:, col] = pixels[:, INDEX_FINGER_TIP]
+        elif name == "wrist":
+            out[:, col] = pixels[:, WRIST]
+        else:
+            knuckle = pixels[:, INDEX_FINGER_MCP]
+            direction = knuckle - pixels[:, WRIST]
+            norm = np.maximum(np.linalg.norm(direction, axis=1, keepdims=True), 1e-6)
+            palm = np.linalg.norm(pixels[:, MIDDLE_FINGER_MCP] - pixels[:, WRIST], axis=1, keepdims=True)
+            out[:, col] = knuckle + direction / norm * palm * stick_length
+    return out
+
+
+def associate(cost: np.ndarray, gate: float) -> List[Optional[int]]:
+    """Greedy nearest-neighbour assignment of detections (columns) to tracks (rows).
+
+    Pairs are taken cheapest first, each track and detection at most once;
+    pairs costing more than ``gate`` are never matched. Returns the matched
+    row per detection, or None for a new track. One sort of the cost
+    matrix, so crowded frames (extra people, false detections) stay cheap.
+    """
+    tracks, detections = cost.shape
+    matches: List[Optional[int]] = [None] * detections
+    if not tracks or not detections:
+        return matches
+    used = np.zeros(tracks, bool)
+    for flat in np.argsort(cost, axis=None, kind="stable").tolist():
+        row, det = divmod(flat, detections)
+        if cost[row, det] > gate:
+            break
+        if used[row] or matches[det] is not None:
+            continue
+        used[row] = True
+        matches[det] = row
+    return matches
+
+
+def _decayed(state: HandState, now: float) -> HandState:
+    vx, vy = state.velocity
+    return replace(
+        state,
+        timestamp=now,
+        v_y=state.v_y * VELOCITY_DECAY,
+        v_mag=state.v_mag * VELOCITY_DECAY,
+        velocity=(vx * VELOCITY_DECAY, vy * VELOCITY_DECAY),
+        acceleration=(0.0, 0.0),
+    )
+
+
+def _close_built(future: Future) -> None:
+    if future.exception() is None:
+        future.result().close()
 
 
 class HandTracker:
-    def __init__(self) -> None:
-        self.solutions = self._load_solutions()
-        self.hands = self.solutions.hands.Hands(
+    def __init__(
+        self,
+        backend: str = "inprocess",
+        crop_to_kit: bool = False,
+        inference_scale: float = 1.0,
+        crop_margin: int = 40,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        point_filter: Optional[PointFilter] = None,
+        points: Tuple[str, ...] = ("index_tip",),
+        stick_length: float = DEFAULT_STICK_LENGTH,
+        governor: Optional[LoadGovernor] = None,
+        motion: Optional[MotionCheck] = None,
+    ) -> None:
+        self.history_size = history_size
+        self.points = tuple(name for name in points if name in STRIKE_POINTS) or ("index_tip",)
+        if len(self.points) != len(points):
+            logging.warning("Unknown strike points in %s, tracking %s", list(points), list(self.points))
+        self.stick_length = stick_length
+        # None keeps the fixed-alpha smoother below.
+        self.point_filter = point_filter
+        self.settings = dict(
             max_num_hands=2,
             model_complexity=1,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5,
         )
-        self.histories: Dict[int, HandHistory] = {}
-        self.smooth_points: Dict[int, Tuple[int, int]] = {}
+        self.backend_name = backend
+        self.backend = create_backend(backend, self.settings)
+        # Load shedding in process(): the governor picks a level, the motion
+        # check skips inference while nothing moves over the kit.
+        self.governor = governor
+        self.motion = motion
+        self.scale_factor = 1.0
+        self.stride = 1
+        self._frames = 0
+        self._idle_frames = 0
+        self._last_states: List[HandState] = []
+        self._carried = False
+        # Set when inference runs only because the gate was idle too long.
+        self._refresh = False
+        self._builder: Optional[ThreadPoolExecutor] = None
+        self._next_backend: Optional[Future] = None
+        # Settings of the newest backend, loaded or still loading.
+        self._model_settings = self.settings
+        # Keyed by (hand id, strike point index).
+        self.histories: Dict[Tuple[int, int], HandHistory] = {}
+        self.smooth_points: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        # Per track id: last time seen and MediaPipe handedness (0 L, 1 R).
+        self.last_seen: Dict[int, float] = {}
+        self.handedness: Dict[int, int] = {}
+        self._next_id = 0
         self.alpha = 0.6
-        logging.info("MediaPipe Hands initialized")
+        self.crop_to_kit = crop_to_kit
+        self.inference_scale = float(min(max(inference_scale, 0.1), 1.0))
+        self.crop_margin = crop_margin
+        self.focus: Optional[Tuple[int, int, int, int]] = None
+        self.last_crop: Optional[Tuple[int, int, int, int]] = None
+        self._hand_boxes: List[Tuple[float, float, float, float]] = []
+        logging.info("MediaPipe Hands initialized (%s backend)", backend)
+
+    def set_focus(self, bounds: Optional[Tuple[int, int, int, int]], regions: Optional[KitRegions] = None) -> None:
+        self.focus = bounds
+        if self.motion is not None:
+            self.motion.set_regions(regions, self.crop_margin)
+
+    def _crop_box(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        if not self.crop_to_kit or self.focus is None:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = self.focus
+        for bx1, by1, bx2, by2 in self._hand_boxes:
+            x1, y1 = min(x1, bx1), min(y1, by1)
+            x2, y2 = max(x2, bx2), max(y2, by2)
+        m = self.crop_margin
+        x1 = max(0, int(x1 - m) // CROP_ALIGN * CROP_ALIGN)
+        y1 = max(0, int(y1 - m) // CROP_ALIGN * CROP_ALIGN)
+        x2 = min(width, -(-int(x2 + m) // CROP_ALIGN) * CROP_ALIGN)
+        y2 = min(height, -(-int(y2 + m) // CROP_ALIGN) * CROP_ALIGN)
+        if x2 - x1 < CROP_ALIGN or y2 - y1 < CROP_ALIGN:
+            return 0, 0, width, height
+        return x1, y1, x2, y2
 
-    def _smooth(self, hand_id: int, point: Tuple[int, int]) -> Tuple[int, int]:
-        if hand_id not in self.smooth_points:
-            self.smooth_points[hand_id] = point
+    def infer(self, frame: np.ndarray, crop: bool = True) -> HandLandmarks:
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = self._crop_box(width, height) if crop else (0, 0, width, height)
+        self.last_crop = (x1, y1, x2, y2)
+        image = frame[y1:y2, x1:x2]
+        scale = max(self.inference_scale * self.scale_factor, 0.1)
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        detected = self.backend.infer(image)
+        landmarks = detected.landmarks
+        if (x1, y1, x2, y2) != (0, 0, width, height):
+            # Landmarks are normalized to the crop; scaling does not change
+            # them, so only the crop offset and extent need undoing.
+            landmarks[..., 0] = (landmarks[..., 0] * (x2 - x1) + x1) / width
+            landmarks[..., 1] = (landmarks[..., 1] * (y2 - y1) + y1) / height
+            landmarks[..., 2] *= (x2 - x1) / width
+        self._hand_boxes = [
+            (
+                float(hand[:, 0].min() * width),
+                float(hand[:, 1].min() * height),
+                float(hand[:, 0].max() * width),
+                float(hand[:, 1].max() * height),
+            )
+            for hand in landmarks
+        ]
+        return detected
+
+    def _smooth(self, key: Tuple[int, int], point: Tuple[int, int]) -> Tuple[int, int]:
+        if key not in self.smooth_points:
+            self.smooth_points[key] = point
             return point
-        prev = self.smooth_points[hand_id]
+        prev = self.smooth_points[key]
         smoothed = (
             int(self.alpha * point[0] + (1 - self.alpha) * prev[0]),
             int(self.alpha * point[1] + (1 - self.alpha) * prev[1]),
         )
-        self.smooth_points[hand_id] = smoothed
+        self.smooth_points[key] = smoothed
         return smoothed
 
-    @staticmethod
-    def _load_solutions():
-        if hasattr(mp, "solutions"):
-            return mp.solutions
+    def process(self, frame: np.ndarray, timestamp: Optional[float] = None) -> List[HandState]:
+        now = timestamp if timestamp is not None else time.monotonic()
+        skipped = self._skip(frame)
+        if skipped:
+            self._last_states = self._carry(now, still=skipped == "motion")
+            return self._last_states
+        self._swap_backend()
+        start = time.perf_counter()
+        detected = self.infer(frame)
+        infer_ms = (time.perf_counter() - start) * 1000
+        if self.governor is not None:
+            level = self.governor.update(infer_ms, time.monotonic())
+            if level is not None:
+                self._apply_level(level)
+        states = self.track(detected, frame.shape[:2], now)
+        if self.motion is not None:
+            self.motion.stats.add_inference(infer_ms)
+            if self._carried and self._refresh:
+                self._check_surprises(states)
+        self._carried = False
+        self._last_states = states
+        return states
+
+    def _carry(self, now: float, still: bool) -> List[HandState]:
+        """The last hands, re-stamped, in place, with decayed velocity.
+
+        ``still`` means the motion gate saw nothing move, which makes the
+        carried position a real sample worth adding to the history.
+        """
+        self._carried = True
+        carried = []
+        for state in self._last_states:
+            # Still there as far as association and expiry are concerned.
+            self.last_seen[state.hand_id] = now
+            points = [_decayed(point, now) for point in state.points] or [_decayed(state, now)]
+            for idx, point in enumerate(points):
+                # Without these samples the next velocity would span the
+                # whole gated stretch.
+                history = self.histories.get((state.hand_id, idx))
+                if still and history is not None:
+                    history.add(now, point.position, point.confidence)
+                    points[idx] = replace(point, history=history.snapshot())
+            carried.append(replace(points[0], points=points if state.points else []))
+        return carried
+
+    def _check_surprises(self, states: List[HandState]) -> None:
+        # Only refreshes count: after a gate opened by motion, the hand is
+        # expected to have moved.
+        carried = {state.hand_id: state.position for state in self._last_states}
+        for state in states:
+            last = carried.get(state.hand_id)
+            if last is None or not self.motion.watches(*state.position):
+                continue
+            if np.hypot(state.position[0] - last[0], state.position[1] - last[1]) > SURPRISE_PX:
+                self.motion.stats.surprises += 1
+
+    def _skip(self, frame: np.ndarray) -> Optional[str]:
+        # Skipped frames carry the last states forward, so throughput stays at
+        # the camera rate whatever inference costs.
+        self._frames += 1
+        if self.stride > 1 and self._frames % self.stride:
+            return "stride"
+        if self.motion is None:
+            return None
+        moving = self.motion.moving(frame)
+        self._refresh = not moving and self._idle_frames >= MAX_IDLE_FRAMES
+        if moving or self._refresh:
+            self._idle_frames = 0
+            return None
+        self._idle_frames += 1
+        self.motion.stats.gated += 1
+        return "motion"
+
+    def _apply_level(self, level: LoadLevel) -> None:
+        self.scale_factor = level.scale
+        self.stride = level.stride
+        settings = level_settings(self.settings, level)
+        if settings == self._model_settings:
+            return
+        self._model_settings = settings
+        # Loading a model takes far longer than a frame, so the new backend
+        # is built in the background and swapped in once ready.
+        if self._builder is None:
+            self._builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drumvision-model")
+        if self._next_backend is not None:
+            # Superseded before it was swapped in.
+            self._next_backend.add_done_callback(_close_built)
+        self._next_backend = self._builder.submit(create_backend, self.backend_name, settings)
+
+    def _swap_backend(self) -> None:
+        future = self._next_backend
+        if future is None or not future.done():
+            return
+        self._next_backend = None
         try:
-            from mediapipe import solutions as mp_solutions
-
-            return mp_solutions
-        except Exception:
-            try:
-                from mediapipe.python import solutions as mp_solutions
-
-                return mp_solutions
-            except Exception as exc:
-                raise RuntimeError(
-                    "MediaPipe 'solutions' API not available. Ensure the official "
-                    "'mediapipe' package is installed and no local mediapipe.py "
-                    "shadows the dependency."
-                ) from exc
-
-    def _strike_point(self, landmarks, image_shape: Tuple[int, int]) -> Tuple[int, int]:
-        h, w = image_shape
-        idx_tip = landmarks[self.solutions.hands.HandLandmark.INDEX_FINGER_TIP]
-        if idx_tip:
-            return int(idx_tip.x * w), int(idx_tip.y * h)
-        wrist = landmarks[self.solutions.hands.HandLandmark.WRIST]
-        palm = [
-            wrist,
-            landmarks[self.solutions.hands.HandLandmark.INDEX_FINGER_MCP],
-            landmarks[self.solutions.hands.HandLandmark.MIDDLE_FINGER_MCP],
-            landmarks[self.solutions.hands.HandLandmark.RING_FINGER_MCP],
-            landmarks[self.solutions.hands.HandLandmark.PINKY_MCP],
-        ]
-        x = int(sum(p.x for p in palm) / len(palm) * w)
-        y = int(sum(p.y for p in palm) / len(palm) * h)
-        return x, y
+            backend = future.result()
+        except Exception as exc:
+            logging.warning("Could not load the governed model, keeping the current one: %s", exc)
+            return
+        self.backend.close()
+        self.backend = backend
+
+    def _predict(self, hand_id: int, now: float) -> Tuple[float, float]:
+        # The first strike point stands for the whole hand.
+        history = self.histories.get((hand_id, 0))
+        if history is None or not len(history):
+            return self.smooth_points.get((hand_id, 0), (0, 0))
+        samples = history.samples(2)
+        t, x, y, _ = samples[-1]
+        if len(samples) < 2:
+            return x, y
+        t0, x0, y0, _ = samples[0]
+        # Constant velocity from the last two samples, so a fast stroke still
+        # lands near its own track rather than the other hand's.
+        scale = min((now - t) / max(t - t0, 1e-6), MAX_EXTRAPOLATION)
+        return x + (x - x0) * scale, y + (y - y0) * scale
+
+    def _associate(self, points: np.ndarray, handedness: np.ndarray, now: float) -> List[int]:
+        track_ids = list(self.last_seen)
+        matches: List[Optional[int]] = [None] * len(points)
+        if track_ids and len(points):
+            predicted = np.array([self._predict(hand_id, now) for hand_id in track_ids], float)
+            cost = np.linalg.norm(predicted[:, None, :] - np.asarray(points, float)[None, :, :], axis=2)
+            known = np.array([self.handedness.get(hand_id, -1) for hand_id in track_ids])[:, None]
+            labels = np.asarray(handedness)[None, : len(points)]
+            cost += HANDEDNESS_PENALTY * ((known >= 0) & (labels >= 0) & (known != labels))
+            matches = associate(cost, MATCH_MAX_DISTANCE)
+        hand_ids = []
+        for det, row in enumerate(matches):
+            if row is None:
+                hand_id = self._next_id
+                self._next_id += 1
+            else:
+                hand_id = track_ids[row]
+            self.last_seen[hand_id] = now
+            if det < len(handedness) and handedness[det] >= 0:
+                self.handedness[hand_id] = int(handedness[det])
+            hand_ids.append(hand_id)
+        return hand_ids
+
+    def _expire(self, now: float) -> None:
+        for hand_id, seen in list(self.last_seen.items()):
+            if now - seen > TRACK_TTL:
+                del self.last_seen[hand_id]
+                self.handedness.pop(hand_id, None)
+                keys = [(hand_id, idx) for idx in range(len(self.points))]
+                for key in keys:
+                    self.histories.pop(key, None)
+                    self.smooth_points.pop(key, None)
+                if self.point_filter is not None:
+                    self.point_filter.forget(keys)
+
+    def track(
+        self, detected: HandLandmarks, frame_shape: Tuple[int, int], timestamp: Optional[float] = None
+    ) -> List[HandState]:
+        # Split from inference so cached landmarks can be replayed without it.
+        # Velocities are only as good as the sample times, so prefer the
+        # capture timestamp over the (later, jittery) post-inference clock.
+        now = timestamp if timestamp is not None else time.monotonic()
+        height, width = frame_shape
+        pixels = detected.landmarks[..., :2] * np.array([width, height], float)
+        raw = strike_points(pixels.reshape(-1, NUM_LANDMARKS, 2), self.points, self.stick_length)
+        return self._track_points(raw, detected.handedness, now)
+
+    def _track_points(self, raw: np.ndarray, labels: np.ndarray, now: float) -> List[HandState]:
+        """(hands, len(self.points), 2) pixel points -> smoothed hand states.
 
-    def process(self, frame: np.ndarray) -> List[HandState]:
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = self.hands.process(image_rgb)
+        ``labels`` (handedness, or any stable per-detection id, -1 unknown)
+        help keep tracks apart during association.
+        """
         states: List[HandState] = []
-        now = time.time()
-        if not result.multi_hand_landmarks:
-            return states
-        for idx, hand_landmarks in enumerate(result.multi_hand_landmarks):
-            point = self._strike_point(hand_landmarks.landmark, frame.shape[:2])
-            point = self._smooth(idx, point)
-            history = self.histories.setdefault(idx, HandHistory())
-            history.add(now, point, 1.0)
-            v_y, v_mag = history.velocity()
-            states.append(
+        # Expire first, so stale tracks do not compete for detections.
+        self._expire(now)
+        hand_ids = self._associate(raw[:, 0], labels, now)
+        keys = [(hand_id, idx) for hand_id in hand_ids for idx in range(len(self.points))]
+        raw = raw.reshape(-1, 2)
+        if self.point_filter is not None and keys:
+            # One vectorized step for every point of every hand in the frame.
+            positions, velocities, accelerations = self.point_filter.update(keys, raw, now)
+        else:
+            positions = np.array([self._smooth(key, (int(x), int(y))) for key, (x, y) in zip(keys, raw.tolist())], float)
+            velocities = accelerations = None
+        points: List[HandState] = []
+        for idx, key in enumerate(keys):
+            x, y = positions[idx].tolist()
+            history = self.histories.get(key)
+            if history is None:
+                history = self.histories[key] = HandHistory(self.history_size)
+            history.add(now, (x, y), 1.0)
+            if velocities is None:
+                # Fixed-alpha path: two-point difference, no acceleration.
+                v_x, v_y = history.velocity()
+                acceleration = (0.0, 0.0)
+            else:
+                v_x, v_y = velocities[idx].tolist()
+                acceleration = tuple(accelerations[idx].tolist())
+            points.append(
                 HandState(
-                    hand_id=idx,
-                    strike_point=point,
+                    hand_id=key[0],
+                    strike_point=(int(round(x)), int(round(y))),
                     v_y=v_y,
-                    v_mag=v_mag,
+                    v_mag=float(np.hypot(v_x, v_y)),
                     timestamp=now,
                     confidence=1.0,
+                    position=(x, y),
+                    velocity=(v_x, v_y),
+                    acceleration=acceleration,
+                    history=history.snapshot(),
+                    point=self.points[key[1]],
                 )
             )
+        per_hand = len(self.points)
+        for start in range(0, len(points), per_hand):
+            # The hand's own state is a copy of its first point, so
+            # hand.points[0] never refers back to the hand.
+            hand_points = points[start : start + per_hand]
+            primary = hand_points[0]
+            states.append(replace(primary, points=hand_points))
         return states
 
     def close(self) -> None:
-        self.hands.close()
+        if self._next_backend is not None:
+            self._next_backend.add_done_callback(_close_built)
+        if self._builder is not None:
+            self._builder.shutdown(wait=True)
+        self.backend.close()
         logging.info("MediaPipe Hands closed")
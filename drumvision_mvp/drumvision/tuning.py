@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import AppConfig
+from .filters import create_filter
+from .hit_detection import HitDetector
+from .kit import DrumKit
+from .landmark_cache import LandmarkCache
+from .replay import META_FILE, TIMESTAMPS_FILE, HitScore, ReplayCamera, load_labels, score_hits, session_hits
+from .tracking import HandState, HandTracker
+from .utils import load_json
+
+# Candidate values per piece. Threshold and radius scale the current value;
+# cooldown and re-arm ratio are absolute.
+THRESHOLD_FACTORS = (0.6, 0.8, 1.0, 1.25, 1.5)
+COOLDOWN_MS = (60, 90, 120, 160)
+RADIUS_FACTORS = (0.85, 1.0, 1.15)
+REARM_RATIOS = (0.25, 0.5, 0.75)
+# Arbitrary clock origin for replays, well past any cooldown.
+REPLAY_BASE = 1000.0
+
+
+@dataclass
+class TuneSession:
+    path: str
+    cache_dir: str
+    frames: int
+    max_hands: int
+    frame_shape: Tuple[int, int]
+    timestamps: np.ndarray
+    labels: List[Dict[str, object]]
+
+
+def prepare_session(path: str, config: AppConfig, tracker_factory) -> Optional[TuneSession]:
+    """Makes sure the session's landmark cache is complete, inferring if needed."""
+    labels = load_labels(path)
+    if labels is None:
+        logging.warning("Skipping %s: no hits.json labels", path)
+        return None
+    # Keyed like the tracker that fills it (and like bench.py's), without
+    # loading a model when the cache is already complete.
+    probe = HandTracker("none", inference_scale=config.inference_scale, history_size=config.history_size)
+    cache = LandmarkCache.for_session(path, probe)
+    if not cache.complete:
+        tracker = tracker_factory()
+        if LandmarkCache.settings_for(tracker) != LandmarkCache.settings_for(probe):
+            tracker.close()
+            raise ValueError(f"Tracker settings do not match the landmark cache key of {path}")
+        camera = ReplayCamera(path)
+        try:
+            while True:
+                captured = camera.read_frame()
+                if captured is None:
+                    break
+                if cache.counts[captured.index - 1] < 0:
+                    cache.put(captured.index - 1, tracker.infer(captured.image, crop=False))
+        finally:
+            camera.release()
+            tracker.close()
+            cache.flush()
+    meta = load_json(os.path.join(path, META_FILE))
+    return TuneSession(
+        path=path,
+        cache_dir=cache.directory,
+        frames=len(cache.counts),
+        max_hands=cache.max_hands,
+        frame_shape=(int(meta["height"]), int(meta["width"])),
+        timestamps=np.load(os.path.join(path, TIMESTAMPS_FILE)),
+        labels=labels,
+    )
+
+
+# (replay timestamp, hands) per frame of a session.
+TrackedFrames = List[Tuple[float, List[HandState]]]
+
+
+def track_session(session: TuneSession, config: AppConfig) -> TrackedFrames:
+    """Tracks the session's cached landmarks once.
+
+    Nothing being tuned affects tracking, so every candidate replays these
+    states; each carries its own history snapshot, so they stay valid.
+    """
+    cache = LandmarkCache(session.cache_dir, session.frames, session.max_hands)
+    tracker = HandTracker(
+        "none",
+        history_size=config.history_size,
+        point_filter=create_filter(config.tracking_filter, config.filter_params),
+        points=tuple(config.strike_points),
+        stick_length=config.stick_length,
+    )
+    frames: TrackedFrames = []
+    try:
+        for index, offset in enumerate(session.timestamps):
+            timestamp = REPLAY_BASE + float(offset)
+            frames.append((timestamp, tracker.track(cache.get(index), session.frame_shape, timestamp)))
+    finally:
+        tracker.close()
+    return frames
+
+
+def replay_hits(frames: TrackedFrames, config: AppConfig, kit: DrumKit) -> List[Dict[str, object]]:
+    detector = HitDetector(
+        predictive=config.predictive_hits,
+        horizon_ms=config.prediction_horizon_ms,
+        confirm_ms=config.prediction_confirm_ms,
+    )
+    events = []
+    for timestamp, hands in frames:
+        events.extend(detector.process(hands, kit, config.mode, timestamp))
+    return session_hits(events, REPLAY_BASE)
+
+
+def candidates(config: AppConfig, piece: str) -> List[Dict[str, float]]:
+    current = config.pieces[piece]
+    return [
+        {
+            "threshold_speed": round(current.threshold_speed * threshold, 1),
+            "cooldown_ms": cooldown,
+            "radius": max(5, int(round(current.radius * radius))),
+            "rearm_ratio": rearm,
+        }
+        for threshold, cooldown, radius, rearm in itertools.product(
+            THRESHOLD_FACTORS, COOLDOWN_MS, RADIUS_FACTORS, REARM_RATIOS
+        )
+    ]
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(
+    sessions: List[TuneSession], tracked: List[TrackedFrames], config_data: Dict[str, Any], tolerance_ms: float
+) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_state["sessions"] = list(zip(sessions, tracked))
+    _worker_state["config"] = AppConfig(**config_data)
+    _worker_state["tolerance_ms"] = tolerance_ms
+
+
+def _evaluate(piece: str, params: Dict[str, float]) -> Tuple[str, Dict[str, float], Dict[str, float]]:
+    config = _worker_state["config"].model_copy(deep=True)
+    for key, value in params.items():
+        setattr(config.pieces[piece], key, value)
+    # Only the tuned piece and the pads that can shadow it take part.
+    priority = config.pieces[piece].priority
+    names = [name for name, cfg in config.pieces.items() if name == piece or cfg.priority > priority]
+    kit = DrumKit.from_config(config).subset(names)
+    total = HitScore()
+    errors = []
+    for session, frames in _worker_state["sessions"]:
+        detected = [hit for hit in replay_hits(frames, config, kit) if hit["piece"] == piece]
+        labels = [hit for hit in session.labels if hit["piece"] == piece]
+        score = score_hits(detected, labels, _worker_state["tolerance_ms"])
+        total.true_positives += score.true_positives
+        total.false_positives += score.false_positives
+        total.false_negatives += score.false_negatives
+        errors.append(score.timing_errors_ms)
+    total.timing_errors_ms = np.concatenate(errors) if errors else np.zeros(0)
+    return piece, params, total.report()
+
+
+def rank(report: Dict[str, float]) -> Tuple[float, float]:
+    # Detection quality first; timing error only breaks ties.
+    return round(report["f1"], 4), -report["timing_mae_ms"]
+
+
+def tune(
+    sessions: List[TuneSession],
+    config: AppConfig,
+    pieces: List[str],
+    tolerance_ms: float = 50.0,
+    workers: Optional[int] = None,
+) -> Dict[str, Tuple[Dict[str, float], Dict[str, float], Dict[str, float]]]:
+    """Grid-searches each piece independently across a process pool.
+
+    Returns piece -> (best params, best report, report of the current params).
+    """
+    tasks: List[Tuple[str, Dict[str, float]]] = []
+    for piece in pieces:
+        current = config.pieces[piece]
+        tasks.append(
+            (
+                piece,
+                {
+                    "threshold_speed": current.threshold_speed,
+                    "cooldown_ms": current.cooldown_ms,
+                    "radius": current.radius,
+                    "rearm_ratio": current.rearm_ratio,
+                },
+            )
+        )
+        tasks.extend((piece, params) for params in candidates(config, piece))
+    logging.info("Tuning %d pieces over %d sessions: %d evaluations", len(pieces), len(sessions), len(tasks))
+    tracked = [track_session(session, config) for session in sessions]
+    results: Dict[str, Tuple[Dict[str, float], Dict[str, float], Dict[str, float]]] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(sessions, tracked, config.model_dump(), tolerance_ms),
+    ) as pool:
+        futures = [pool.submit(_evaluate, piece, params) for piece, params in tasks]
+        baseline: Dict[str, Dict[str, float]] = {}
+        for future in futures:
+            piece, params, report = future.result()
+            if piece not in baseline:
+                # The first task per piece is its current configuration.
+                baseline[piece] = report
+                results[piece] = (params, report, report)
+                continue
+            if rank(report) > rank(results[piece][1]):
+                results[piece] = (params, report, baseline[piece])
+    return results
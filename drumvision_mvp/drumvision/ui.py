@@ -1,63 +1,142 @@
 from __future__ import annotations
 
+import time
+from typing import Dict, List, Optional, Tuple
+
 import cv2
-from typing import Dict, List, Tuple
+import numpy as np
 
 from .kit import DrumKit
 from .tracking import HandState
 
+HELP_TEXT = "Keys: q quit | c calibrate | s save | l load | m MIDI | o mode | a learn | d debug | t latency | p perf"
+# How long a pad stays highlighted after a hit (s).
+HIT_FLASH_SECONDS = 0.15
+
 
 class UI:
+    """Draws the preview.
+
+    Pads, labels, ROIs and the help line only change with the kit, so they are
+    rasterized once into a BGRA layer and blended onto each frame in one
+    vectorized step; only the dynamic parts (hands, flashes, status and stats
+    text) are drawn per frame.
+    """
+
     def __init__(self) -> None:
         self.debug = True
         self.last_hit: Tuple[str, int] | None = None
+        self.show_stats = False
+        self.stats_lines: List[str] = []
+        self._layer_key: Optional[tuple] = None
+        # Flat byte offsets (B, G, R of each pixel) the layer covers, their
+        # 256 - alpha in 1/256 steps, and their premultiplied colour.
+        self._layer_index = np.zeros(0, np.intp)
+        self._layer_inv_alpha = np.zeros(0, np.uint16)
+        self._layer_color = np.zeros(0, np.uint16)
+        self._flashes: Dict[str, float] = {}
 
     def toggle_debug(self) -> None:
         self.debug = not self.debug
 
+    def toggle_stats(self) -> None:
+        self.show_stats = not self.show_stats
+
+    def flash(self, piece_name: str) -> None:
+        self._flashes[piece_name] = time.monotonic()
+
+    def _build_layer(self, kit: DrumKit, mode: str, shape: Tuple[int, int], scale: float) -> None:
+        height, width = shape
+        layer = np.zeros((height, width, 4), np.uint8)
+        font = max(0.5 * scale, 0.35)
+        for piece in kit.list_pieces():
+            color = (50, 200, 50, 255)
+            cx, cy = int(piece.position[0] * scale), int(piece.position[1] * scale)
+            radius = int(piece.radius * scale)
+            cv2.circle(layer, (cx, cy), radius, color, 2)
+            cv2.putText(
+                layer,
+                piece.name,
+                (cx - int(30 * scale), cy - radius - 5),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                font,
+                color,
+                1,
+            )
+            if piece.roi and mode == "object":
+                x1, y1, x2, y2 = (int(v * scale) for v in piece.roi)
+                cv2.rectangle(layer, (x1, y1), (x2, y2), (200, 200, 0, 255), 1)
+        if self.debug:
+            cv2.putText(layer, HELP_TEXT, (10, height - 10), cv2.FONT_HERSHEY_SIMPLEX, font, (200, 200, 200, 255), 1)
+        alpha = layer[..., 3].reshape(-1)
+        pixels = np.flatnonzero(alpha)
+        # Indexing single bytes of the flat frame is much faster than
+        # gathering (n, 3) rows.
+        self._layer_index = (pixels[:, None] * 3 + np.arange(3)).ravel()
+        inv_alpha = 255 - alpha[pixels].astype(np.uint16)
+        self._layer_inv_alpha = np.repeat((inv_alpha * 256 + 127) // 255, 3)
+        # cv2 blends BGR and alpha alike when drawing onto a transparent BGRA
+        # image, so the colour channels come out premultiplied.
+        self._layer_color = layer[..., :3].reshape(-1, 3)[pixels].astype(np.uint16).ravel()
+
+    def _blend(self, frame: np.ndarray) -> None:
+        flat = frame.reshape(-1)
+        values = flat[self._layer_index].astype(np.uint16)
+        values *= self._layer_inv_alpha
+        values >>= 8
+        values += self._layer_color
+        flat[self._layer_index] = values
+
     def draw(
         self,
         frame,
         kit: DrumKit,
         hands: List[HandState],
-        inside_map: Dict[Tuple[int, str], bool],
         mode: str,
         fps: float,
         midi_enabled: bool,
         audio_enabled: bool,
         message: str,
+        scale: float = 1.0,
     ):
-        for piece in kit.list_pieces():
-            color = (50, 200, 50)
-            cv2.circle(frame, piece.position, piece.radius, color, 2)
-            cv2.putText(
-                frame,
-                piece.name,
-                (piece.position[0] - 30, piece.position[1] - piece.radius - 5),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                color,
-                1,
-            )
-            if piece.roi and mode == "object":
-                x1, y1, x2, y2 = piece.roi
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (200, 200, 0), 1)
+        """``scale`` is the size of ``frame`` relative to camera coordinates."""
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        key = (id(kit), kit.revision, mode, frame.shape[:2], scale, self.debug)
+        if key != self._layer_key:
+            self._layer_key = key
+            self._build_layer(kit, mode, frame.shape[:2], scale)
+        self._blend(frame)
+
+        now = time.monotonic()
+        for name, hit_time in list(self._flashes.items()):
+            piece = kit.pieces.get(name)
+            if piece is None or now - hit_time > HIT_FLASH_SECONDS:
+                del self._flashes[name]
+                continue
+            center = (int(piece.position[0] * scale), int(piece.position[1] * scale))
+            cv2.circle(frame, center, int(piece.radius * scale), (0, 255, 255), 4)
 
         for hand in hands:
-            cv2.circle(frame, hand.strike_point, 8, (255, 0, 0), -1)
+            x, y = hand.strike_point
+            cv2.circle(frame, (int(x * scale), int(y * scale)), max(int(8 * scale), 3), (255, 0, 0), -1)
+            for point in hand.points[1:]:
+                x, y = point.strike_point
+                cv2.circle(frame, (int(x * scale), int(y * scale)), max(int(5 * scale), 2), (255, 128, 0), -1)
 
+        font = max(0.5 * scale, 0.35)
         status_text = f"FPS: {fps:.1f} | Mode: {mode.upper()} | MIDI: {'ON' if midi_enabled else 'OFF'} | AUDIO: {'ON' if audio_enabled else 'OFF'}"
-        cv2.putText(frame, status_text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        cv2.putText(frame, status_text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, font, (255, 255, 255), 1)
 
         if self.last_hit:
             hit_text = f"Hit: {self.last_hit[0]} vel={self.last_hit[1]}"
-            cv2.putText(frame, hit_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            cv2.putText(frame, hit_text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, font, (0, 255, 255), 1)
 
         if message:
-            cv2.putText(frame, message, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 200, 0), 1)
+            cv2.putText(frame, message, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, font, (255, 200, 0), 1)
 
-        if self.debug:
-            help_text = "Keys: q quit | c calibrate | s save | l load | m MIDI | o mode | d debug"
-            cv2.putText(frame, help_text, (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        if self.show_stats:
+            for idx, line in enumerate(self.stats_lines):
+                cv2.putText(frame, line, (10, 80 + 18 * idx), cv2.FONT_HERSHEY_SIMPLEX, 0.9 * font, (0, 200, 255), 1)
 
         return frame
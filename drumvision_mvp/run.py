@@ -1,24 +1,37 @@
 from __future__ import annotations
 
+import argparse
 import logging
 import os
 import sys
+import threading
 import time
-from typing import List
+from typing import Callable, List, Optional
 
 import cv2
 
 from drumvision.audio_out import AudioOut
-from drumvision.calibrator import Calibrator
+from drumvision.calibrator import Calibrator, LearningMode
 from drumvision.camera import CameraManager
 from drumvision.config import AppConfig, ConfigManager
-from drumvision.hit_detection import HitDetector
+from drumvision.filters import create_filter
+from drumvision.governor import LoadGovernor, MotionCheck
+from drumvision.hit_detection import HitDetector, HitEvent
+from drumvision.impact import ImpactDetector
 from drumvision.kit import DrumKit
+from drumvision.markers import MARKER_KINDS, MarkerTracker
 from drumvision.midi_out import MidiOut
-from drumvision.tracking import HandTracker
+from drumvision.multicam import MultiCameraManager
+from drumvision.pipeline import FramePacket, LatestQueue, Pipeline
+from drumvision.profiling import FrameTrace, Profiler
+from drumvision.replay import ReplayCamera, SessionRecorder
+from drumvision.tracking import HandState, HandTracker
 from drumvision.ui import UI
 from drumvision.utils import FPSCounter, setup_logging
 
+WINDOW_NAME = "DrumVision MVP"
+STATS_LOG_INTERVAL = 5.0
+
 
 def update_config_from_kit(config: AppConfig, kit: DrumKit) -> None:
     for name, piece in kit.pieces.items():
@@ -30,115 +43,480 @@ def update_config_from_kit(config: AppConfig, kit: DrumKit) -> None:
             config.pieces[name].roi = list(piece.roi)
 
 
-def main() -> None:
-    setup_logging()
-    logging.info("Starting DrumVision MVP")
+def create_tracker(config: AppConfig) -> HandTracker:
+    if config.tracker_backend in MARKER_KINDS:
+        # Marker detection is cheap enough that the load governor has
+        # nothing to shed; strike points are the markers themselves.
+        return MarkerTracker(
+            config.tracker_backend,
+            config.marker_hsv_min,
+            config.marker_hsv_max,
+            config.aruco_dictionary,
+            config.max_markers,
+            config.crop_to_kit,
+            config.crop_margin,
+            config.history_size,
+            create_filter(config.tracking_filter, config.filter_params),
+            MotionCheck() if config.motion_skip else None,
+        )
+    if config.tracker_backend != "mediapipe":
+        logging.warning("Unknown tracker backend %s, using mediapipe", config.tracker_backend)
+    return HandTracker(
+        config.inference_backend,
+        config.crop_to_kit,
+        config.inference_scale,
+        config.crop_margin,
+        config.history_size,
+        create_filter(config.tracking_filter, config.filter_params),
+        tuple(config.strike_points),
+        config.stick_length,
+        LoadGovernor(config.inference_budget_ms) if config.load_governor else None,
+        MotionCheck() if config.motion_skip else None,
+    )
 
-    config_manager = ConfigManager()
-    config = config_manager.config
 
-    try:
-        camera = CameraManager(config.camera_id)
-    except RuntimeError as exc:
-        logging.error("Camera error: %s", exc)
-        sys.exit(1)
+def create_detector(config: AppConfig) -> HitDetector:
+    return HitDetector(
+        predictive=config.predictive_hits,
+        horizon_ms=config.prediction_horizon_ms,
+        confirm_ms=config.prediction_confirm_ms,
+        impact=ImpactDetector() if config.object_impact else None,
+    )
 
-    try:
-        tracker = HandTracker()
-    except Exception as exc:
-        logging.error("MediaPipe init failed: %s", exc)
-        sys.exit(1)
 
-    kit = DrumKit.from_config(config)
-    detector = HitDetector()
-    midi_out = MidiOut(enabled=config.midi_enabled)
-    audio_out = AudioOut(enabled=config.audio_enabled)
-    ui = UI()
-    calibrator = Calibrator()
-    fps_counter = FPSCounter()
+class DrumVisionApp:
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        camera: Optional[CameraManager] = None,
+        tracker: Optional[HandTracker] = None,
+        multicam: Optional[MultiCameraManager] = None,
+        recorder: Optional[SessionRecorder] = None,
+    ) -> None:
+        self.config_manager = config_manager
+        self.config = config_manager.config
+        self.camera = camera
+        self.tracker = tracker
+        self.multicam = multicam
+        self.recorder = recorder
+        self.kit = DrumKit.from_config(self.config)
+        self.detector = create_detector(self.config)
+        self.midi_out = MidiOut(enabled=self.config.midi_enabled, latency_ms=self.config.output_latency_ms)
+        self.audio_out = AudioOut(
+            enabled=self.config.audio_enabled,
+            engine=self.config.audio_engine,
+            buffer_size=self.config.audio_buffer_size,
+            max_voices=self.config.audio_max_voices,
+            choke_groups={
+                name: piece.choke_group for name, piece in self.config.pieces.items() if piece.choke_group
+            },
+        )
+        self.ui = UI()
+        self.calibrator = Calibrator()
+        self.learner = LearningMode(self.config.learning_seconds)
+        self.fps_counter = FPSCounter()
+        self.profiler = Profiler()
+        self.message = ""
+        self._last_stats_log = time.monotonic()
+        self._last_render = 0.0
+        # Size of the preview relative to camera coordinates, for the mouse.
+        self.display_scale = 1.0
+        self._focus_key: Optional[tuple] = None
+        # A max-speed replay's capture times run ahead of the monotonic
+        # clock, so hits are sent at once and capture-relative latencies
+        # are not recorded.
+        self.live_clock = not (isinstance(camera, ReplayCamera) and not camera.realtime)
+        # Guards kit/config/calibrator, which the detection stage and the key
+        # handler on the main thread both touch in threaded mode.
+        self.lock = threading.RLock()
 
-    cv2.namedWindow("DrumVision MVP")
+    def dispatch(self, events: List[HitEvent]) -> None:
+        # Hit-path latency runs from the (estimated) impact to the hand-off
+        # to each output, so it covers capture, inference and detection.
+        for event in events:
+            if event.cancelled:
+                logging.info("Cancelled predicted hit %s hand=%s", event.piece_name, event.hand_id)
+                if self.config.midi_enabled:
+                    self.midi_out.cancel_hit(event.hit_id)
+                if self.config.audio_enabled:
+                    self.audio_out.cancel_hit(event.hit_id)
+                continue
+            logging.info(
+                "Hit %s vel=%s hand=%s%s",
+                event.piece_name,
+                event.velocity,
+                event.hand_id,
+                " (predicted)" if event.predicted else "",
+            )
+            if self.config.midi_enabled:
+                timestamp = event.timestamp if self.live_clock else None
+                self.midi_out.send_hit(event.midi_note, event.velocity, timestamp, event.hit_id)
+                if self.live_clock:
+                    self.profiler.hit("midi", event.timestamp)
+            if self.config.audio_enabled:
+                self.audio_out.play_hit(event.piece_name, event.velocity, event.hit_id)
+                if self.live_clock:
+                    self.profiler.hit("audio", event.timestamp)
+            self.ui.last_hit = (event.piece_name, event.velocity)
+            self.ui.flash(event.piece_name)
+            if self.recorder is not None:
+                self.recorder.add_hit(event)
 
-    def mouse_callback(event, x, y, flags, params):
-        calibrator.on_mouse(event, x, y, flags, params)
+    def infer(self, image, trace: FrameTrace) -> List[HandState]:
+        trace.infer_start = time.monotonic()
+        hands = self.tracker.process(image, trace.capture)
+        trace.infer_end = time.monotonic()
+        return hands
 
-    cv2.setMouseCallback("DrumVision MVP", mouse_callback)
+    def detect(self, hands: List[HandState], trace: Optional[FrameTrace] = None, frame=None) -> List[HitEvent]:
+        with self.lock:
+            now = trace.capture if trace is not None else None
+            events = self.detector.process(hands, self.kit, self.config.mode, now, frame)
+            if trace is not None:
+                trace.detect_end = time.monotonic()
+                self.profiler.frame(trace, self.live_clock)
+            self.dispatch(events)
+            self.update_calibration(hands)
+        return events
 
-    message = ""
-    while True:
-        ret, frame = camera.read()
-        if not ret:
-            logging.warning("Failed to read camera frame")
-            continue
+    def update_calibration(self, hands: List[HandState]) -> None:
+        with self.lock:
+            if self.calibrator.state.active:
+                if self.calibrator.state.step == 0:
+                    self.message = self.calibrator.update_layout(hands, self.kit)
+                else:
+                    self.message = self.calibrator.update_thresholds(hands, self.kit)
+            elif self.learner.active:
+                self.message = self.learner.update(hands, self.kit, self.config.mode, time.monotonic())
+            self.update_focus()
 
-        hands = tracker.process(frame)
-        events = detector.process(hands, kit, config.mode)
-        for event in events:
-            logging.info(
-                "Hit %s vel=%s hand=%s", event.piece_name, event.velocity, event.hand_id
-            )
-            if config.midi_enabled:
-                midi_out.send_hit(event.midi_note, event.velocity)
-            if config.audio_enabled:
-                audio_out.play_hit(event.piece_name, event.velocity)
-            ui.last_hit = (event.piece_name, event.velocity)
-
-        if calibrator.state.active:
-            if calibrator.state.step == 0:
-                message = calibrator.update_layout(hands, kit)
+    def update_focus(self) -> None:
+        # The tracker crops to the kit, but calibration needs the whole frame
+        # since pads are being moved; re-focus once it ends or the kit changes.
+        calibrating = self.calibrator.state.active
+        key = (id(self.kit), calibrating)
+        if key == self._focus_key:
+            return
+        self._focus_key = key
+        if self.tracker is not None:
+            if calibrating:
+                self.tracker.set_focus(None)
             else:
-                message = calibrator.update_thresholds(hands, kit)
+                self.tracker.set_focus(self.kit.bounds(), self.kit.regions())
+        if self.multicam is not None:
+            self.multicam.set_focus(not calibrating)
 
-        fps = fps_counter.tick()
-        frame = ui.draw(
+    def should_render(self) -> bool:
+        # Performance mode throttles the preview; hits are unaffected since
+        # detection never waits on rendering.
+        if not self.config.performance_mode:
+            return True
+        now = time.monotonic()
+        if now - self._last_render < 1.0 / max(self.config.render_fps, 1.0):
+            return False
+        self._last_render = now
+        return True
+
+    def render(self, frame, hands: List[HandState]):
+        start = time.monotonic()
+        fps = self.fps_counter.tick()
+        if self.ui.show_stats:
+            self.ui.stats_lines = self.profiler.lines()
+        scale = 1.0
+        if self.config.performance_mode and self.config.render_scale < 1.0:
+            scale = max(self.config.render_scale, 0.1)
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        self.display_scale = scale
+        # No lock here: rendering must never hold up the detection stage.
+        frame = self.ui.draw(
             frame,
-            kit,
+            self.kit,
             hands,
-            detector.inside_state,
-            config.mode,
+            self.config.mode,
             fps,
-            config.midi_enabled,
-            config.audio_enabled,
-            message,
+            self.config.midi_enabled,
+            self.config.audio_enabled,
+            self.message,
+            scale,
         )
+        self.profiler.record("render", (time.monotonic() - start) * 1000)
+        return frame
 
-        cv2.imshow("DrumVision MVP", frame)
-        key = cv2.waitKey(1) & 0xFF
+    def log_stats(self, describe: Optional[Callable[[], str]] = None) -> None:
+        now = time.monotonic()
+        if now - self._last_stats_log < STATS_LOG_INTERVAL:
+            return
+        self._last_stats_log = now
+        if describe is not None:
+            logging.info(describe())
+        logging.info("Latency %s", self.profiler.summary())
+        if self.tracker is not None and self.tracker.motion is not None:
+            logging.info("Motion gate %s", self.tracker.motion.stats.summary())
+        self.profiler.dump()
 
+    def handle_key(self, key: int, hands: List[HandState]) -> bool:
         if key == ord("q"):
-            break
-        if key == ord("d"):
-            ui.toggle_debug()
-        if key == ord("m"):
-            config_manager.toggle_midi()
-            config = config_manager.config
-            midi_out.enabled = config.midi_enabled
-        if key == ord("o"):
-            config.mode = "object" if config.mode == "air" else "air"
-        if key == ord("c"):
-            calibrator.start()
-            message = "Calibration started"
-        if key == ord("s"):
-            update_config_from_kit(config, kit)
-            config_manager.save()
-            message = "Config saved"
-        if key == ord("l"):
-            config_manager = ConfigManager()
-            config = config_manager.config
-            kit = DrumKit.from_config(config)
-            message = "Config loaded"
-        if key == ord("1") and calibrator.state.active and calibrator.state.step == 0:
-            message = calibrator.confirm_position(hands, kit) or message
-        if calibrator.state.active:
-            msg = calibrator.handle_key(key, kit)
-            if msg:
-                message = msg
-
-    camera.release()
-    tracker.close()
-    midi_out.close()
-    audio_out.close()
-    cv2.destroyAllWindows()
+            return False
+        with self.lock:
+            if key == ord("d"):
+                self.ui.toggle_debug()
+            if key == ord("t"):
+                self.ui.toggle_stats()
+            if key == ord("p"):
+                self.config.performance_mode = not self.config.performance_mode
+                self.message = f"Performance mode {'ON' if self.config.performance_mode else 'OFF'}"
+            if key == ord("x"):
+                self.profiler.dump()
+                self.message = "Latency stats written"
+            if key == ord("m"):
+                self.config_manager.toggle_midi()
+                self.config = self.config_manager.config
+                self.midi_out.enabled = self.config.midi_enabled
+            if key == ord("o"):
+                self.config.mode = "object" if self.config.mode == "air" else "air"
+            if key == ord("c"):
+                self.learner.active = False
+                self.calibrator.start()
+                self.message = "Calibration started"
+            if key == ord("a") and not self.calibrator.state.active:
+                if self.learner.active:
+                    self.message = self.learner.stop()
+                else:
+                    self.learner.start(time.monotonic())
+                    self.message = "Learning mode: play freely"
+            if key == ord("s"):
+                update_config_from_kit(self.config, self.kit)
+                self.config_manager.save()
+                self.message = "Config saved"
+            if key == ord("l"):
+                self.config_manager = ConfigManager()
+                self.config = self.config_manager.config
+                self.kit = DrumKit.from_config(self.config)
+                self.message = "Config loaded"
+            if key == ord("1") and self.calibrator.state.active and self.calibrator.state.step == 0:
+                self.message = self.calibrator.confirm_position(hands, self.kit) or self.message
+            if self.calibrator.state.active:
+                msg = self.calibrator.handle_key(key, self.kit)
+                if msg:
+                    self.message = msg
+        return True
+
+    def run_sequential(self) -> None:
+        # In performance mode the preview is drawn on its own thread from the
+        # newest detected frame, so the loop only hands it over; imshow and
+        # waitKey stay here, since HighGUI wants a single thread.
+        to_render = LatestQueue(1)
+        rendered = LatestQueue(1)
+        running = threading.Event()
+        running.set()
+
+        def render_loop() -> None:
+            while running.is_set():
+                item = to_render.get(timeout=0.1)
+                if item is not None:
+                    rendered.put(self.render(*item))
+
+        renderer = threading.Thread(target=render_loop, name="drumvision-render", daemon=True)
+        renderer.start()
+        try:
+            while True:
+                captured = self.camera.read_frame()
+                if captured is None:
+                    if self.camera.finished:
+                        break
+                    logging.warning("Failed to read camera frame")
+                    continue
+                if self.recorder is not None:
+                    self.recorder.write(captured)
+
+                trace = FrameTrace(captured.timestamp)
+                hands = self.infer(captured.image, trace)
+                self.detect(hands, trace, captured.image)
+                if self.should_render():
+                    if self.config.performance_mode:
+                        to_render.put((captured.image, hands))
+                    else:
+                        cv2.imshow(WINDOW_NAME, self.render(captured.image, hands))
+                preview = rendered.get(timeout=0)
+                if preview is not None:
+                    cv2.imshow(WINDOW_NAME, preview)
+                key = cv2.waitKey(1) & 0xFF
+                if not self.handle_key(key, hands):
+                    break
+                self.log_stats()
+        finally:
+            running.clear()
+            to_render.close()
+            renderer.join(timeout=1.0)
+
+    def run_threaded(self) -> None:
+        def read_frame():
+            captured = self.camera.read_frame()
+            if captured is None:
+                return False, None, 0.0
+            if self.recorder is not None:
+                self.recorder.write(captured)
+            return True, captured.image, captured.timestamp
+
+        def infer(packet: FramePacket) -> None:
+            packet.hands = self.infer(packet.frame, packet.trace)
+
+        def detect(packet: FramePacket) -> None:
+            packet.events = self.detect(packet.hands, packet.trace, packet.frame)
+
+        pipeline = Pipeline(read_frame, infer, detect, queue_size=self.config.pipeline_queue_size)
+        pipeline.start()
+        hands: List[HandState] = []
+        try:
+            while True:
+                packet = pipeline.next_render()
+                if packet is None:
+                    if self.camera.finished:
+                        break
+                else:
+                    hands = packet.hands
+                    if self.should_render():
+                        start = time.perf_counter()
+                        cv2.imshow(WINDOW_NAME, self.render(packet.frame, hands))
+                        pipeline.record_render((time.perf_counter() - start) * 1000)
+                key = cv2.waitKey(1) & 0xFF
+                if not self.handle_key(key, hands):
+                    break
+                self.log_stats(lambda: f"Pipeline {pipeline.summary()} | camera dropped={self.camera.frames_dropped}")
+        finally:
+            pipeline.stop()
+
+    def run_multicam(self) -> None:
+        multicam = self.multicam
+        multicam.mode = self.config.mode
+        multicam.profiler = self.profiler
+        multicam.set_kit(self.kit, self.config.piece_cameras)
+        multicam.start()
+        running = threading.Event()
+        running.set()
+
+        def output_loop() -> None:
+            while running.is_set():
+                events = multicam.wait_hits()
+                if events:
+                    with self.lock:
+                        self.dispatch(events)
+
+        output = threading.Thread(target=output_loop, name="drumvision-output", daemon=True)
+        output.start()
+        hands: List[HandState] = []
+        kit = self.kit
+        last_index = 0
+        try:
+            while True:
+                latest = multicam.latest()
+                if latest is not None and latest[0].index != last_index:
+                    captured, hands = latest
+                    last_index = captured.index
+                    # Hit detection already ran on the camera workers; the
+                    # primary camera only drives calibration and the preview.
+                    self.update_calibration(hands)
+                    if self.should_render():
+                        cv2.imshow(WINDOW_NAME, self.render(captured.image.copy(), hands))
+                key = cv2.waitKey(1) & 0xFF
+                if not self.handle_key(key, hands):
+                    break
+                multicam.mode = self.config.mode
+                if self.kit is not kit:
+                    kit = self.kit
+                    multicam.set_kit(kit, self.config.piece_cameras)
+                self.log_stats(lambda: f"Multi-camera {multicam.summary()}")
+        finally:
+            running.clear()
+            multicam.stop()
+            output.join(timeout=1.0)
+
+    def close(self) -> None:
+        self.profiler.dump()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.camera is not None:
+            self.camera.release()
+        if self.tracker is not None:
+            self.tracker.close()
+        if self.multicam is not None:
+            self.multicam.release()
+        self.midi_out.close()
+        self.audio_out.close()
+        cv2.destroyAllWindows()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DrumVision MVP")
+    parser.add_argument("--record", metavar="DIR", help="save camera frames and timestamps to a session directory")
+    parser.add_argument("--replay", metavar="DIR", help="play back a recorded session instead of the camera")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace instead of max speed")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    setup_logging()
+    logging.info("Starting DrumVision MVP")
+
+    config_manager = ConfigManager()
+    config = config_manager.config
+    recorder = SessionRecorder(args.record) if args.record else None
+
+    camera_ids = config_manager.camera_ids()
+    if len(camera_ids) > 1 and not args.replay:
+        if recorder is not None:
+            logging.warning("Recording is not supported with multiple cameras")
+            recorder = None
+        try:
+            multicam = MultiCameraManager(
+                camera_ids,
+                lambda: create_tracker(config),
+                config.hit_fusion_window_ms,
+                lambda: create_detector(config),
+            )
+        except RuntimeError as exc:
+            logging.error("Camera error: %s", exc)
+            sys.exit(1)
+        except Exception as exc:
+            logging.error("MediaPipe init failed: %s", exc)
+            sys.exit(1)
+        app = DrumVisionApp(config_manager, multicam=multicam)
+    else:
+        try:
+            if args.replay:
+                camera = ReplayCamera(args.replay, realtime=args.realtime)
+            else:
+                camera = CameraManager(config.camera_id, background_grab=config.camera_background_grab)
+        except RuntimeError as exc:
+            logging.error("Camera error: %s", exc)
+            sys.exit(1)
+
+        try:
+            tracker = create_tracker(config)
+        except Exception as exc:
+            logging.error("MediaPipe init failed: %s", exc)
+            sys.exit(1)
+
+        app = DrumVisionApp(config_manager, camera, tracker, recorder=recorder)
+
+    cv2.namedWindow(WINDOW_NAME)
+
+    def mouse_callback(event, x, y, flags, params):
+        scale = app.display_scale
+        app.calibrator.on_mouse(event, int(x / scale), int(y / scale), flags, params)
+
+    cv2.setMouseCallback(WINDOW_NAME, mouse_callback)
+
+    try:
+        if app.multicam is not None:
+            app.run_multicam()
+        elif config.threaded_pipeline:
+            app.run_threaded()
+        else:
+            app.run_sequential()
+    finally:
+        app.close()
 
 
 if __name__ == "__main__":
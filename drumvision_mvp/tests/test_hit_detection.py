@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import List, Tuple
+
+from drumvision.config import ConfigManager
+from drumvision.hit_detection import HitDetector
+from drumvision.kit import DrumKit
+from drumvision.tracking import HandState
+
+
+def hand(now: float, tip: Tuple[float, float], wrist: Tuple[float, float], v_y: float) -> HandState:
+    points: List[HandState] = [
+        HandState(
+            hand_id=0,
+            strike_point=(int(x), int(y)),
+            v_y=v_y,
+            v_mag=abs(v_y),
+            timestamp=now,
+            confidence=1.0,
+            position=(x, y),
+            velocity=(0.0, v_y),
+            point=name,
+        )
+        for name, (x, y) in (("index_tip", tip), ("wrist", wrist))
+    ]
+    return replace(points[0], points=points)
+
+
+def test_one_stroke_fires_once_across_strike_points():
+    kit = DrumKit.from_config(ConfigManager().config)
+    snare = kit.pieces["snare"]
+    cx, cy = snare.position
+    detector = HitDetector()
+    events = []
+    # The tip enters the snare first; the wrist, 100 px behind, follows it
+    # in well after the cooldown while the tip is still inside.
+    for frame in range(12):
+        now = 1.0 + frame / 30.0
+        tip_y = cy - 100 + 20 * frame if frame < 6 else cy
+        wrist_y = tip_y - 100 + 15 * max(0, frame - 5)
+        events += detector.process([hand(now, (cx, tip_y), (cx, wrist_y), 600.0)], kit, "air", now)
+
+    assert [event.piece_name for event in events] == ["snare"]
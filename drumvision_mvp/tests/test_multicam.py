@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from drumvision.hit_detection import HitEvent
+from drumvision.multicam import HitFusion
+
+
+def hit(timestamp: float, velocity: int = 90, predicted: bool = False) -> HitEvent:
+    return HitEvent("snare", 38, velocity, timestamp, 0, 1.0, predicted=predicted)
+
+
+def test_first_candidate_is_released_without_waiting_for_the_window():
+    fusion = HitFusion(window_ms=30.0)
+    first, duplicate = hit(10.0), hit(10.01)
+
+    fusion.add([first])
+    assert fusion.wait_ready(timeout=0.0) == [first]
+    fusion.add([duplicate])
+    assert fusion.wait_ready(timeout=0.0) == []
+    assert fusion.merged == 1
+
+
+def test_cancelled_release_hands_over_to_another_cameras_hit():
+    fusion = HitFusion(window_ms=30.0)
+    predicted, real = hit(10.0, predicted=True), hit(10.02, velocity=70)
+    fusion.add([predicted, real])
+    fusion.wait_ready(timeout=0.0)
+
+    cancel = replace(predicted, cancelled=True)
+    fusion.add([cancel])
+
+    assert fusion.wait_ready(timeout=0.0) == [cancel, real]
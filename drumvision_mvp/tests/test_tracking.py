@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+
+from drumvision.markers import MarkerDetections, MarkerTracker
+from drumvision.tracking import associate
+
+
+def test_associate_takes_cheapest_pairs_within_the_gate():
+    cost = np.array([[40.0, 30.0], [20.0, 300.0], [160.0, 170.0]])
+
+    assert associate(cost, 150.0) == [1, 0]
+    assert associate(cost[2:], 150.0) == [None, None]
+
+
+def test_jump_after_a_short_frame_interval_keeps_track_ids():
+    tracker = MarkerTracker("color")
+    points = np.array([[200.0, 200.0], [420.0, 200.0]])
+    labels = np.full(2, -1)
+    now = 0.0
+    seen = set()
+    for frame in range(12):
+        # Uneven capture intervals: a 33 px jump timed over 2 ms is
+        # extrapolated over the following 30 ms.
+        now += (0.002, 0.03)[frame % 2]
+        if frame == 4:
+            points = points + (0.0, 33.0)
+        states = tracker.track(MarkerDetections(points, labels), (480, 640), now)
+        seen.update(state.hand_id for state in states)
+
+    assert seen == {0, 1}
+
+
+def test_states_hold_a_frozen_history():
+    tracker = MarkerTracker("color")
+    labels = np.full(1, -1)
+    first = tracker.track(MarkerDetections(np.array([[100.0, 100.0]]), labels), (480, 640), 0.0)
+    second = tracker.track(MarkerDetections(np.array([[100.0, 110.0]]), labels), (480, 640), 0.01)
+    tracker.track(MarkerDetections(np.array([[100.0, 130.0]]), labels), (480, 640), 0.02)
+
+    # Inference for later frames must not change what detection reads.
+    assert len(first[0].history) == 1
+    assert second[0].history.samples()[:, 0].tolist() == [0.0, 0.01]
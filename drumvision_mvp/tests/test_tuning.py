@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+
+from drumvision.camera import CapturedFrame
+from drumvision.config import ConfigManager
+from drumvision.inference import HandLandmarks
+from drumvision.landmark_cache import LandmarkCache
+from drumvision.replay import LABELS_FILE, SessionRecorder
+from drumvision.tracking import HandTracker
+from drumvision.tuning import prepare_session
+from drumvision.utils import save_json
+
+
+class FakeTracker(HandTracker):
+    """A "none" tracker whose inference finds no hands."""
+
+    def infer(self, frame: np.ndarray, crop: bool = True) -> HandLandmarks:
+        return HandLandmarks.empty()
+
+
+def record_session(path: str, frames: int = 3) -> None:
+    recorder = SessionRecorder(path)
+    for index in range(frames):
+        image = np.full((48, 64, 3), 40 * index, np.uint8)
+        recorder.write(CapturedFrame(image, index / 30.0, index + 1))
+    recorder.close()
+    save_json(f"{path}/{LABELS_FILE}", {"hits": []})
+
+
+def test_prepare_session_keys_cache_at_the_configured_scale(tmp_path):
+    path = str(tmp_path / "session")
+    record_session(path)
+    config = ConfigManager().config.model_copy(update={"inference_scale": 0.5})
+
+    session = prepare_session(path, config, lambda: FakeTracker("none", inference_scale=config.inference_scale))
+
+    # The key bench.py derives from a tracker at the real setting.
+    expected = LandmarkCache.for_session(path, FakeTracker("none", inference_scale=0.5))
+    full_scale = LandmarkCache.for_session(path, FakeTracker("none", inference_scale=1.0))
+    assert session.cache_dir == expected.directory
+    assert session.cache_dir != full_scale.directory
+    assert expected.complete
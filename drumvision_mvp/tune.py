@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+import logging
+
+from drumvision.config import USER_CONFIG_PATH, ConfigManager
+from drumvision.tuning import prepare_session, tune
+from drumvision.utils import setup_logging
+from run import create_tracker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tune per-piece detection parameters on labelled sessions")
+    parser.add_argument("sessions", nargs="+", help="session directories with hits.json labels")
+    parser.add_argument("--pieces", nargs="+", help="only tune these pieces (default: all labelled pieces)")
+    parser.add_argument("--tolerance-ms", type=float, default=50.0, help="max timing error of a matched hit")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--dry-run", action="store_true", help=f"report only, do not write {USER_CONFIG_PATH}")
+    args = parser.parse_args()
+    setup_logging()
+
+    config_manager = ConfigManager()
+    config = config_manager.config
+    if config.tracker_backend != "mediapipe":
+        logging.error("Tuning replays cached MediaPipe landmarks; set tracker_backend to mediapipe")
+        return
+    sessions = [prepare_session(path, config, lambda: create_tracker(config)) for path in args.sessions]
+    sessions = [session for session in sessions if session is not None]
+    if not sessions:
+        logging.error("No labelled sessions to tune on")
+        return
+    labelled = {str(hit["piece"]) for session in sessions for hit in session.labels}
+    pieces = [name for name in config.pieces if name in labelled and (not args.pieces or name in args.pieces)]
+
+    results = tune(sessions, config, pieces, args.tolerance_ms, args.workers)
+    for piece, (params, best, current) in results.items():
+        print(
+            f"{piece:<8} f1 {current['f1']:.3f} -> {best['f1']:.3f}  "
+            f"mae {current['timing_mae_ms']:.1f} -> {best['timing_mae_ms']:.1f} ms  "
+            f"precision {best['precision']:.3f} recall {best['recall']:.3f}  {params}"
+        )
+        for key, value in params.items():
+            setattr(config.pieces[piece], key, value)
+    if args.dry_run:
+        return
+    config_manager.save(USER_CONFIG_PATH)
+
+
+if __name__ == "__main__":
+    main()